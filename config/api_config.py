@@ -21,6 +21,29 @@ RATE_LIMITS = {
     'cooldown_period': 3600            # 1 hour cooldown if near limit
 }
 
+# Per-host token buckets, used until rate-limit response headers report the real quota
+HOST_RATE_LIMITS = {
+    'api.github.com': {'capacity': 60, 'per_second': 5000 / 3600},
+    'api.llama.fi': {'capacity': 10, 'per_second': 5},
+}
+DEFAULT_HOST_RATE_LIMIT = {'capacity': 5, 'per_second': 1}
+RATE_LIMIT_FALLBACK_BACKOFF = 60  # Seconds to wait on a rate-limit response that gives no reset time
+
+# Request Policy (shared by the blocking and async clients)
+REQUEST_TIMEOUT = 30          # Seconds per HTTP request
+REQUEST_RETRIES = 3           # Retries after a failed or rate-limited request
+RETRY_DELAY = 5               # Seconds between retries of a failed request
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read at a time from streamed response bodies
+
+# Async Client Settings
+ASYNC_FETCH_CONCURRENCY = 16  # Requests in flight at once during bulk fetches
+HTTP_POOL_SIZE = 8            # Keep-alive connections held per host
+
+# HTTP Cache Settings
+ENABLE_HTTP_CACHE = True      # Serve fresh responses from disk and revalidate stale ones with ETags
+HTTP_CACHE_DIR = "data/cache/http"
+HTTP_CACHE_MAX_MB = 512
+
 def get_github_token():
     """Get GitHub token from environment with fallback"""
     return os.getenv('GITHUB_TOKEN', '')
@@ -2,6 +2,8 @@
 Professional Security Research Platform - Main Settings
 """
 
+import os
+
 # DeFi Llama API Configuration
 DEFI_LLAMA_ENDPOINTS = {
     'all_protocols': 'https://api.llama.fi/protocols',
@@ -9,6 +11,18 @@ DEFI_LLAMA_ENDPOINTS = {
     'recently_added': 'https://api.llama.fi/updatedProtocols'
 }
 
+# Protocol Discovery Settings
+PROTOCOL_FIELDS = [           # Protocol list fields kept for high-risk targets; the rest is dropped while parsing
+    'id', 'name', 'slug', 'url', 'github', 'audits', 'audit_links', 'tvl', 'listedAt', 'category', 'chains',
+    'forkedFrom'
+]
+
+# Protocol Enrichment Settings
+ENRICH_PROTOCOL_DETAILS = True  # Fetch protocol_details for every high-risk candidate (async, pooled)
+PROTOCOL_DETAIL_FIELDS = [    # Detail fields kept; the rest (TVL history) is dropped on arrival
+    'forkedFrom', 'github', 'audit_links', 'chains', 'currentChainTvls', 'oracles', 'parentProtocol'
+]
+
 # Risk Assessment Settings
 RISK_THRESHOLDS = {
     'max_age_days': 90,           # Target protocols < 3 months old
@@ -18,19 +32,73 @@ RISK_THRESHOLDS = {
     'require_github': True        # Must have source code
 }
 
-# Universal V2 AMM Patterns
-V2_AMM_PATTERNS = {
-    'interfaces': [
-        'IUniswapV2Pair', 'IPancakePair', 'IJoePair', 'ISushiSwapPair',
-        'IQuickSwapPair', 'ISpookySwapPair', 'IPangolinPair'
-    ],
-    'vulnerabilities': [
-        'getReserves()',
-        'token0()',
-        'token1()',
-        'balanceOf(0x'
-    ]
-}
+# Rule Pack Settings
+RULE_PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")  # Shipped *.yaml packs
+RULESET_ARTIFACT_PATH = "data/cache/ruleset.json"  # Compiled ruleset, rebuilt when a pack changes
+RULESET_RELOAD_INTERVAL = 5   # Seconds between checks for edited packs in long-running scans
+
+# Regex Execution Settings
+REGEX_ENGINE = 'auto'         # 'auto'/'re2' use RE2 when installed, 're' forces Python re
+RULE_TIME_BUDGET = 5          # Seconds a single rule may run on one file (soft outside the main thread)
+FILE_TIME_BUDGET = 30         # Seconds all rules together may run on one file (soft outside the main thread)
+
+# Source Loading Settings
+SCAN_MODE = 'text'            # 'text' decodes files, 'bytes' scans memory-mapped raw bytes
+SCAN_SOURCE = 'worktree'      # 'worktree' reads checked-out files, 'git' reads HEAD blobs from the object store
+BARE_CLONES = False           # Clone without a working tree; bare repos are always scanned from git
+
+# Lexer Settings
+STRIP_COMMENTS_AND_STRINGS = True  # Detectors match on code with comments and string literals blanked
+CODE_VIEW_CACHE_SIZE = 256    # Lexer products (code views, block indexes) kept in memory, keyed by content hash
+CODE_VIEW_CACHE_MB = 64       # Cap on the stripped code views kept per process (each pool worker has its own)
+
+# File Enumeration Settings
+EXCLUDE_DIRS = [              # Directory names pruned before descending (dependencies, VCS, build output)
+    'node_modules', '.git', 'artifacts', 'cache', 'out', 'typechain', 'typechain-types', 'coverage', '.deps'
+]
+EXCLUDE_GLOBS = []            # Repo-relative path globs to skip, e.g. 'contracts/mocks/*'
+GENERATED_FILE_GLOBS = []     # Opt-in file-name globs to skip, e.g. '*_flat.sol' (flattened deployments are often audit targets)
+MAX_SOURCE_FILE_KB = 0        # Opt-in size cap for source files (0 = none); skipped files are listed in scan results
+USE_GIT_LS_FILES = True       # List git checkouts with `git ls-files` (honours .gitignore natively)
+
+# Parallel Scan Settings
+SCAN_WORKERS = 1              # Processes per repository scan (1 = serial, 0 = one per CPU core)
+SCAN_CHUNK_SIZE = 32          # Files sent to a worker per task
+
+# Batch Scan Settings
+BATCH_SCAN_WORKERS = 1        # Protocols scanned concurrently (1 = serial, in-process)
+PROTOCOL_SCAN_TIMEOUT = 1800  # Wall-clock cap per protocol scan (seconds)
+PROTOCOL_MEMORY_LIMIT_MB = 4096  # Address-space cap per protocol scan process
+TOP_FINDINGS_PER_PROTOCOL = 10  # Most severe findings ranked while streaming, for display
+
+# Clone Settings
+CLONE_WORKERS = 4             # Repositories cloned/updated concurrently (1 = serial)
+CLONE_PER_HOST_LIMIT = 2      # Concurrent git operations against one host
+CLONE_TIMEOUT = 300           # Seconds a single clone may take
+UPDATE_TIMEOUT = 180          # Seconds a single update may take
+CLONE_RETRIES = 2             # Extra attempts for a failed clone/update
+CLONE_RETRY_BACKOFF = 5       # Seconds before the first retry, doubled for each later one
+PARTIAL_CLONES = True         # Blobless clone that checks out only SPARSE_CHECKOUT_PATTERNS
+SPARSE_CHECKOUT_PATTERNS = ['*.sol']  # gitignore-style patterns kept in partial clones
+SPARSE_EXTRA_PATHS = []       # More paths to check out, e.g. 'out/' or 'artifacts/' build output
+SKIP_UNCHANGED_REMOTES = True  # Skip updating repos whose HEAD already matches the remote's (git ls-remote)
+REMOTE_PROBE_WORKERS = 16     # Concurrent ls-remote probes before a batch update
+REMOTE_PROBE_TIMEOUT = 30     # Seconds a single ls-remote probe may take
+SHARED_OBJECT_CACHE = False   # Clones borrow objects from one shared store (git alternates), fetched unfiltered
+OBJECT_CACHE_DIR = "data/protocols/object_cache.git"
+OBJECT_CACHE_GC_INTERVAL = 86400  # Seconds between garbage collections of the shared store
+OBJECT_CACHE_PRUNE = '2.weeks.ago'  # Unreferenced cache objects newer than this survive a collection
+
+# Incremental Scan Settings
+ENABLE_INCREMENTAL_SCANS = True  # Rescan only files changed since the last scanned commit
+
+# Price Taint Settings
+ENABLE_PRICE_TAINT = True     # Trace spot-price findings through the call graph to state-changing functions
+
+# Finding Cache Settings
+ENABLE_FINDING_CACHE = True
+FINDING_CACHE_PATH = "data/cache/findings.sqlite"
+FINDING_CACHE_MAX_MB = 256
 
 # File Paths
 DATA_DIR = "data/"
@@ -0,0 +1,68 @@
+"""
+Per-commit Call Graph and Price-taint Results
+"""
+
+import json
+import os
+from datetime import datetime
+from config.settings import PROTOCOLS_DIR
+
+class CallGraphStore:
+    def __init__(self):
+        self.graph_dir = os.path.join(PROTOCOLS_DIR, "call_graph")
+        os.makedirs(self.graph_dir, exist_ok=True)
+    
+    def _graph_file(self, repo_path):
+        """Graph file named after the repository directory"""
+        repo_name = os.path.basename(os.path.normpath(repo_path))
+        return os.path.join(self.graph_dir, f"{repo_name}.json")
+    
+    def load(self, repo_path, commit, version):
+        """Stored graph for exactly this commit and analysis version, or None"""
+        graph_file = self._graph_file(repo_path)
+        if not commit or not os.path.exists(graph_file):
+            return None
+        
+        try:
+            with open(graph_file, 'r') as f:
+                graph = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable call graph {graph_file}: {e}")
+            return None
+        
+        if graph.get('commit') != commit or graph.get('version') != version:
+            return None
+        
+        graph['symbols'] = {
+            os.path.join(repo_path, rel_path): file_symbols
+            for rel_path, file_symbols in graph.get('symbols', {}).items()
+        }
+        graph['taint']['paths'] = [
+            {**path, 'sink_file': os.path.join(repo_path, path['sink_file']),
+             'source_file': os.path.join(repo_path, path['source_file'])}
+            for path in graph['taint'].get('paths', [])
+        ]
+        return graph
+    
+    def save(self, repo_path, commit, version, symbols, taint):
+        """Store the symbol table and taint paths computed at a commit"""
+        graph = {
+            'commit': commit,
+            'version': version,
+            'saved_at': datetime.now().isoformat(),
+            'symbols': {
+                os.path.relpath(file_path, repo_path): file_symbols
+                for file_path, file_symbols in symbols.items()
+            },
+            'taint': {
+                **taint,
+                'paths': [
+                    {**path, 'sink_file': os.path.relpath(path['sink_file'], repo_path),
+                     'source_file': os.path.relpath(path['source_file'], repo_path)}
+                    for path in taint['paths']
+                ]
+            }
+        }
+        
+        with open(self._graph_file(repo_path), 'w') as f:
+            json.dump(graph, f)
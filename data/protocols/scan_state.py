@@ -0,0 +1,76 @@
+"""
+Per-repository Scan State for Incremental Rescans
+"""
+
+import json
+import os
+from datetime import datetime
+from config.settings import PROTOCOLS_DIR
+
+class ScanStateStore:
+    def __init__(self):
+        self.state_dir = os.path.join(PROTOCOLS_DIR, "scan_state")
+        os.makedirs(self.state_dir, exist_ok=True)
+    
+    def _state_file(self, repo_path):
+        """State file named after the repository directory"""
+        repo_name = os.path.basename(os.path.normpath(repo_path))
+        return os.path.join(self.state_dir, f"{repo_name}.json")
+    
+    def load(self, repo_path):
+        """Load stored per-file results, re-attributed to repo_path"""
+        state_file = self._state_file(repo_path)
+        if not os.path.exists(state_file):
+            return None
+        
+        try:
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable scan state {state_file}: {e}")
+            return None
+        
+        file_findings = state.get('file_findings')
+        if file_findings is not None:
+            file_findings = {
+                os.path.join(repo_path, rel_path): [
+                    {'file': os.path.join(repo_path, rel_path), **finding} for finding in findings
+                ]
+                for rel_path, findings in file_findings.items()
+            }
+        
+        return {
+            'commit': state.get('commit'),
+            'ruleset': state.get('ruleset'),
+            'file_indicators': {
+                os.path.join(repo_path, rel_path): indicators
+                for rel_path, indicators in state.get('file_indicators', {}).items()
+            },
+            'file_findings': file_findings
+        }
+    
+    def save(self, repo_path, commit, file_indicators, file_findings, ruleset=None):
+        """Store per-file results for the scanned commit and the rule versions that produced them"""
+        if file_findings is not None:
+            # Files where a rule timed out are rescanned next run
+            file_findings = {
+                os.path.relpath(file_path, repo_path): [
+                    {k: v for k, v in finding.items() if k != 'file'} for finding in findings
+                ]
+                for file_path, findings in file_findings.items()
+                if not any(finding.get('timed_out') for finding in findings)
+            }
+        
+        state = {
+            'commit': commit,
+            'ruleset': ruleset,
+            'saved_at': datetime.now().isoformat(),
+            'file_indicators': {
+                os.path.relpath(file_path, repo_path): indicators
+                for file_path, indicators in file_indicators.items()
+            },
+            'file_findings': file_findings
+        }
+        
+        with open(self._state_file(repo_path), 'w') as f:
+            json.dump(state, f)
@@ -0,0 +1,39 @@
+"""
+Per-batch Record of Repository Update Decisions
+"""
+
+import json
+import os
+from datetime import datetime
+from config.settings import PROTOCOLS_DIR
+
+class UpdateLogStore:
+    def __init__(self):
+        self.log_file = os.path.join(PROTOCOLS_DIR, "update_log.json")
+        os.makedirs(PROTOCOLS_DIR, exist_ok=True)
+    
+    def load(self):
+        """Decisions of the last batch keyed by repository directory name"""
+        if not os.path.exists(self.log_file):
+            return {}
+        try:
+            with open(self.log_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save(self, repo_heads):
+        """Record whether each repository was cloned, updated, skipped or failed, with the heads compared"""
+        log = {
+            'saved_at': datetime.now().isoformat(),
+            'decisions': dict(sorted(
+                (os.path.basename(os.path.normpath(repo_path)), entry) for repo_path, entry in repo_heads.items()
+            )),
+            'counts': {}
+        }
+        for entry in repo_heads.values():
+            decision = entry.get('decision', 'unknown')
+            log['counts'][decision] = log['counts'].get(decision, 0) + 1
+        
+        with open(self.log_file, 'w') as f:
+            json.dump(log, f, indent=2)
@@ -2,101 +2,284 @@
 Universal V2 Vulnerability Pattern Matching
 """
 
-import re
 import os
-from config.settings import V2_AMM_PATTERNS
+import mmap
+import time
+from config.settings import (
+    REGEX_ENGINE, RULE_TIME_BUDGET, FILE_TIME_BUDGET,
+    SCAN_WORKERS, SCAN_CHUNK_SIZE, SCAN_MODE
+)
+from utils.repo_snapshot import load_source
+from utils.git_source import open_snapshot
+from utils.literal_prefilter import LiteralPrefilter
+from utils.line_index import LineIndex, decode_snippet
+from utils.regex_engine import RegexEngine, RegexTimeout
+from utils.parallel import parallel_map, resolve_workers
+from utils.finding_cache import default_finding_cache, ruleset_hash
+from utils.content_store import ContentStore
+from utils.solidity_lexer import code_view, CODE_VIEW_VERSION
+from utils.block_index import BLOCK_INDEXES, BLOCK_INDEX_VERSION
+from utils.rule_packs import default_ruleset_loader
+from detectors.top_findings import SEVERITY_ORDER
+
+# Per-process matcher used by parallel scan workers
+_worker_matcher = None
+
+def _init_worker(engine_mode, rule_budget, file_budget, scan_mode, ruleset):
+    global _worker_matcher
+    # Workers get the parent's ruleset so a reload mid-scan can't mix rule versions
+    _worker_matcher = PatternMatcher(engine_mode, rule_budget, file_budget, workers=1, cache=None,
+                                     scan_mode=scan_mode, ruleset=ruleset)
+
+def _scan_in_worker(item):
+    file_path, content, content_hash = item
+    # Workers lex their own files rather than receiving a second copy of each
+    return _worker_matcher.scan_file_for_vulnerabilities(file_path, content, content_hash=content_hash)
 
 class PatternMatcher:
-    def __init__(self):
-        self.patterns = self._compile_vulnerability_patterns()
+    def __init__(self, engine_mode=REGEX_ENGINE, rule_budget=RULE_TIME_BUDGET, file_budget=FILE_TIME_BUDGET,
+                 workers=SCAN_WORKERS, chunk_size=SCAN_CHUNK_SIZE, cache=default_finding_cache,
+                 scan_mode=SCAN_MODE, ruleset=None):
+        self.engine = RegexEngine(engine_mode, rule_budget, file_budget)
+        self.scan_mode = scan_mode
+        self.worker_args = (engine_mode, rule_budget, file_budget, scan_mode)
+        self.workers = resolve_workers(workers)
+        self.chunk_size = chunk_size
+        self.cache = cache() if callable(cache) else cache
+        # An explicit ruleset is fixed; otherwise follow the shared loader and its hot reloads
+        self.ruleset_loader = None if ruleset else default_ruleset_loader()
+        self._apply_ruleset(ruleset or self.ruleset_loader.ruleset)
     
-    def _compile_vulnerability_patterns(self):
-        """Compile regex patterns for vulnerability detection"""
-        return {
-            'CRITICAL': [
-                # Direct getReserves() usage without validation
-                re.compile(r'getReserves\s*\(\s*\)[^}]*?=[^}]*?reserve', re.IGNORECASE),
-                # getReserves in view functions without TWAP
-                re.compile(r'function.*view.*getReserves', re.IGNORECASE),
-            ],
-            'HIGH': [
-                # Manual token0/token1 division
-                re.compile(r'token0\s*\(\s*\)[^/]*/[^}]*token1\s*\(\s*\)', re.IGNORECASE),
-                # Direct reserve division
-                re.compile(r'reserve0\s*/\s*reserve1', re.IGNORECASE),
-            ],
-            'MEDIUM': [
-                # Raw balanceOf usage on pool addresses
-                re.compile(r'balanceOf\s*\(\s*0x[a-fA-F0-9]{40}\s*\)', re.IGNORECASE),
-                # Direct pool interactions without checks
-                re.compile(r'IUniswapV2Pair.*balanceOf', re.IGNORECASE),
-            ]
-        }
+    def _apply_ruleset(self, ruleset):
+        """Compile a ruleset's detection rules and rekey cached results to its version"""
+        self.ruleset = ruleset
+        self.patterns = {}
+        self.anchors = {}
+        self.scopes = {}
+        self.rule_ids = {}
+        
+        # Rules arrive ordered by severity; anchors, scopes and ids are keyed by pattern
+        for rule in ruleset['rules']:
+            self.patterns.setdefault(rule['severity'], []).append(self.engine.compile(rule['pattern'], rule['flags']))
+            self.anchors[rule['pattern']] = tuple(rule['anchors'])
+            self.rule_ids[rule['pattern']] = rule['id']
+            if rule['scope']:
+                self.scopes[rule['pattern']] = rule['scope']
+        
+        self.prefilter = LiteralPrefilter(
+            [anchor for anchors in self.anchors.values() for anchor in anchors],
+            ignore_case=True
+        )
+        self.ruleset_version = self._ruleset_version()
+        # Identical blobs across all repos in this run are scanned once
+        self.content_store = ContentStore('pattern_matcher', self.ruleset_version, self.cache)
+    
+    def refresh_rules(self):
+        """Switch to edited rule packs between repository scans"""
+        if self.ruleset_loader is None:
+            return
+        self.ruleset_loader.reload_if_changed()
+        if self.ruleset_loader.ruleset['version'] != self.ruleset['version']:
+            self._apply_ruleset(self.ruleset_loader.ruleset)
+    
+    def _ruleset_version(self):
+        """Hash of the rule packs, the engine running each rule and the lexer feeding them"""
+        return ruleset_hash([CODE_VIEW_VERSION, BLOCK_INDEX_VERSION, self.ruleset['version']] + [
+            pattern.engine for patterns in self.patterns.values() for pattern in patterns
+        ])
     
-    def scan_file_for_vulnerabilities(self, file_path):
+    def _active_patterns(self, content):
+        """Yield (severity, pattern) for rules whose anchors occur in content"""
+        found = self.prefilter.find(content)
+        
+        for severity, patterns in self.patterns.items():
+            for pattern in patterns:
+                anchors = self.anchors.get(pattern.pattern, ())
+                if all(anchor in found for anchor in anchors):
+                    yield severity, pattern
+    
+    def scan_file_for_vulnerabilities(self, file_path, content=None, code=None, content_hash=None):
         """Scan a single file for vulnerability patterns"""
         vulnerabilities = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                lines = content.split('\n')
+            if content is None:
+                content = load_source(file_path, self.scan_mode)
+            if code is None:
+                code = code_view(content)
+            
+            # Rules match the code view so comments and string literals never fire;
+            # it keeps every offset, so lines and snippets come from the original
+            active_patterns = list(self._active_patterns(code))
+            if not active_patterns:
+                return vulnerabilities
             
-            for severity, patterns in self.patterns.items():
-                for pattern in patterns:
-                    matches = pattern.finditer(content)
-                    for match in matches:
-                        # Find line number
-                        line_number = self._find_line_number(content, match.start())
-                        line_content = lines[line_number].strip() if line_number < len(lines) else ""
-                        
-                        vulnerability = {
-                            'file': file_path,
-                            'line_number': line_number + 1,  # 1-based for humans
-                            'severity': severity,
-                            'pattern': pattern.pattern,
-                            'matched_text': match.group()[:100],  # First 100 chars
-                            'line_content': line_content
-                        }
-                        vulnerabilities.append(vulnerability)
+            line_index = LineIndex(content)
+            block_index = None
+            file_deadline = time.monotonic() + self.engine.file_budget if self.engine.file_budget else None
+            
+            for severity, pattern in active_patterns:
+                # Scoped rules only search the bodies of matching functions/modifiers
+                spans = None
+                scope = self.scopes.get(pattern.pattern)
+                if scope is not None:
+                    if block_index is None:
+                        # Built once per blob and shared with price taint's symbol extraction
+                        block_index = BLOCK_INDEXES.get(content_hash, code)
+                    spans = block_index.spans(scope['kinds'], scope.get('mutability'))
+                    if not spans:
+                        continue
+                
+                # Each rule gets its own budget, capped by what is left for the file
+                budget = self.engine.rule_budget
+                if file_deadline is not None:
+                    remaining = file_deadline - time.monotonic()
+                    budget = min(budget, remaining) if budget else remaining
+                
+                try:
+                    if budget is not None and budget <= 0:
+                        raise RegexTimeout()
+                    matches = self.engine.find_all(pattern, code, budget, spans)
+                except RegexTimeout:
+                    print(f"⏰ Rule timed out on {file_path}: {pattern.pattern}")
+                    vulnerabilities.append(self._timeout_finding(file_path, severity, pattern))
+                    continue
+                
+                for match in matches:
+                    # Find line number
+                    line_number, column = self._find_line_number(line_index, match.start())
+                    line_content = line_index.line(line_number).strip()
+                    
+                    vulnerability = {
+                        'file': file_path,
+                        'rule_id': self.rule_ids.get(pattern.pattern),
+                        'line_number': line_number + 1,  # 1-based for humans
+                        'column': column + 1,
+                        'severity': severity,
+                        'pattern': pattern.pattern,
+                        'matched_text': self._matched_text(content, match),
+                        'line_content': line_content
+                    }
+                    vulnerabilities.append(vulnerability)
         
         except Exception as e:
             print(f"⚠️ Error scanning file {file_path}: {e}")
         
         return vulnerabilities
     
-    def _find_line_number(self, content, position):
-        """Find line number for a character position"""
-        return content[:position].count('\n')
+    def _matched_text(self, content, match):
+        """First 100 characters of a match, decoding only that slice in bytes mode"""
+        end = min(match.end(), match.start() + 400)
+        return decode_snippet(content[match.start():end])[:100]
     
-    def scan_repository(self, repo_path):
+    def _timeout_finding(self, file_path, severity, pattern):
+        """Record a rule that exceeded its time budget instead of hanging the scan"""
+        return {
+            'file': file_path,
+            'rule_id': self.rule_ids.get(pattern.pattern),
+            'line_number': 0,
+            'column': 0,
+            'severity': 'TIMEOUT',
+            'rule_severity': severity,
+            'pattern': pattern.pattern,
+            'matched_text': '',
+            'line_content': '',
+            'timed_out': True
+        }
+    
+    def _find_line_number(self, line_index, position):
+        """Find (line, column) for a character position"""
+        return line_index.position(position)
+    
+    def scan_repository(self, repo_path, snapshot=None):
         """Scan entire repository for vulnerabilities"""
         print(f"🔍 Scanning repository for vulnerabilities: {repo_path}")
         
-        all_vulnerabilities = []
-        solidity_files = self._find_solidity_files(repo_path)
+        if snapshot is None:
+            snapshot = open_snapshot(repo_path)
+        
+        return self.flatten_findings(self.scan_files(snapshot))
+    
+    def scan_files(self, snapshot, known=None):
+        """Per-file findings in snapshot order, reusing `known` results for unchanged files"""
+        return dict(self.iter_file_findings(snapshot, known))
+    
+    def iter_findings(self, repo_path, snapshot=None):
+        """Yield individual findings as each file finishes, without collecting the repository"""
+        print(f"🔍 Streaming vulnerability scan: {repo_path}")
+        
+        if snapshot is None:
+            snapshot = open_snapshot(repo_path)
+        
+        for _, findings in self.iter_file_findings(snapshot):
+            yield from findings
+    
+    def iter_file_findings(self, snapshot, known=None):
+        """Yield (file_path, findings) in snapshot order as each file finishes"""
+        self.refresh_rules()
+        known = known or {}
+        solidity_files = self._find_solidity_files(snapshot)
+        pending = [file_path for file_path in solidity_files if file_path not in known]
         
+        # Timed-out rules may finish next run, so those results are not persisted
+        resolved = self.content_store.iter_resolve(
+            snapshot, pending, self._scan_blobs,
+            persistable=lambda findings: not any(f.get('timed_out') for f in findings)
+        )
+        next_resolved = next(resolved, None)
+        
+        # Unreadable files are skipped; known results for deleted files are dropped
         for file_path in solidity_files:
-            file_vulnerabilities = self.scan_file_for_vulnerabilities(file_path)
+            if file_path in known:
+                yield file_path, known[file_path]
+            elif next_resolved is not None and next_resolved[0] == file_path:
+                yield file_path, [{'file': file_path, **finding} for finding in next_resolved[1]]
+                next_resolved = next(resolved, None)
+    
+    def _scan_blobs(self, files_with_content):
+        """Scan one file per unique blob and return path-free findings in order"""
+        if self.workers > 1 and len(files_with_content) > self.chunk_size:
+            # Memory maps can't be pickled - workers map those files themselves; git blobs are sent as-is
+            items = (
+                (file_path, None if isinstance(content, mmap.mmap) else content, content_hash)
+                for file_path, content, _, content_hash in files_with_content
+            )
+            # Chunks come back in submission order, so output matches the serial path
+            scanned = parallel_map(
+                _scan_in_worker, items, self.workers, self.chunk_size,
+                initializer=_init_worker, initargs=self.worker_args + (self.ruleset,)
+            )
+        else:
+            scanned = (
+                self.scan_file_for_vulnerabilities(file_path, content, code, content_hash)
+                for file_path, content, code, content_hash in files_with_content
+            )
+        
+        for findings in scanned:
+            yield [{k: v for k, v in finding.items() if k != 'file'} for finding in findings]
+    
+    def flatten_findings(self, file_findings):
+        """Combine per-file findings into one list ordered by severity"""
+        all_vulnerabilities = []
+        
+        for file_vulnerabilities in file_findings.values():
             all_vulnerabilities.extend(file_vulnerabilities)
         
         # Sort by severity
-        severity_order = {'CRITICAL': 3, 'HIGH': 2, 'MEDIUM': 1}
-        all_vulnerabilities.sort(key=lambda x: severity_order.get(x['severity'], 0), reverse=True)
+        all_vulnerabilities.sort(key=lambda x: SEVERITY_ORDER.get(x['severity'], 0), reverse=True)
         
         return all_vulnerabilities
     
-    def _find_solidity_files(self, repo_path):
-        """Find all Solidity files in repository"""
+    def _find_solidity_files(self, snapshot):
+        """Find all Solidity files in the snapshot worth scanning"""
         solidity_files = []
         
-        for root, dirs, files in os.walk(repo_path):
-            # Skip node_modules and other common non-source directories
-            if 'node_modules' in root or 'test' in root.lower():
+        for file_path in snapshot.files:
+            # Dependency trees are pruned by the enumerator; skip test directories inside the repo
+            root = os.path.dirname(os.path.relpath(file_path, snapshot.repo_path))
+            if 'test' in root.lower():
                 continue
-                
-            for file in files:
-                if file.endswith('.sol'):
-                    solidity_files.append(os.path.join(root, file))
+            
+            solidity_files.append(file_path)
         
         return solidity_files
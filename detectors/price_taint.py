@@ -0,0 +1,187 @@
+"""
+Repository Call Graph and Spot-price Taint Tracking
+"""
+
+import re
+from collections import deque
+from utils.block_index import BLOCK_INDEXES, BLOCK_INDEX_VERSION
+from utils.line_index import LineIndex, decode_snippet
+from utils.solidity_lexer import code_view, CODE_VIEW_VERSION
+from utils.finding_cache import default_finding_cache, ruleset_hash
+from utils.content_store import ContentStore
+from detectors.top_findings import SEVERITY_ORDER
+
+# Bump when extracted symbols change shape so cached symbol tables are rebuilt
+SYMBOL_VERSION = 1
+
+CALL = re.compile(r'\b([A-Za-z_]\w*)\s*\(')
+CALL_BYTES = re.compile(rb'\b([A-Za-z_]\w*)\s*\(')
+# Control flow, builtins and casts that look like calls but never name a repository function
+NOT_CALLS = {
+    'if', 'for', 'while', 'return', 'returns', 'emit', 'new', 'require', 'assert', 'revert',
+    'address', 'payable', 'mapping', 'type', 'keccak256', 'sha256', 'ecrecover', 'abi', 'string', 'bool'
+}
+TYPE_CAST = re.compile(r'u?int\d*|bytes\d*')
+
+def extract_symbols(code, content_hash=None):
+    """Function symbols of one file: location, visibility, mutability and called names"""
+    if code is None:
+        return []
+    
+    line_index = LineIndex(code)
+    call_regex = CALL if isinstance(code, str) else CALL_BYTES
+    symbols = []
+    
+    for block in BLOCK_INDEXES.get(content_hash, code).functions():
+        calls = {
+            decode_snippet(match.group(1))
+            for match in call_regex.finditer(code, block['body_start'], block['end'])
+        }
+        symbols.append({
+            'contract': block['contract'],
+            'name': block['name'],
+            'visibility': block['visibility'],
+            'mutability': block['mutability'],
+            'start_line': line_index.line_number(block['start']) + 1,
+            'end_line': line_index.line_number(block['end'] - 1) + 1,
+            'calls': sorted(name for name in calls if name not in NOT_CALLS and not TYPE_CAST.fullmatch(name))
+        })
+    
+    return symbols
+
+class PriceTaintAnalyzer:
+    """Links spot-price findings to the state-changing entry points that can reach them"""
+    
+    def __init__(self, cache=default_finding_cache, store=None):
+        self.symbols_version = ruleset_hash([CODE_VIEW_VERSION, BLOCK_INDEX_VERSION, SYMBOL_VERSION])
+        self.cache = cache() if callable(cache) else cache
+        # Symbols of unchanged blobs come straight from the finding cache
+        self.content_store = ContentStore('price_taint_symbols', self.symbols_version, self.cache)
+        self.store = store
+    
+    def analyze(self, repo_path, snapshot, file_findings, commit=None, source_ruleset='', unchanged=False):
+        """Taint paths for a repository, reusing the stored graph when nothing changed at commit"""
+        # Taint also depends on the rules that produced the source findings
+        version = ruleset_hash([self.symbols_version, source_ruleset])
+        if unchanged and self.store is not None:
+            stored = self.store.load(repo_path, commit, version)
+            if stored is not None:
+                return stored['taint']
+        
+        symbols = self.content_store.resolve(snapshot, list(file_findings), self._extract_blobs)
+        taint = self.trace(symbols, file_findings)
+        
+        if commit and self.store is not None:
+            self.store.save(repo_path, commit, version, symbols, taint)
+        return taint
+    
+    def _extract_blobs(self, files_with_content):
+        """Extract symbols once per unique blob"""
+        for file_path, content, code, content_hash in files_with_content:
+            if code is None and content is not None:
+                code = code_view(content)
+            yield extract_symbols(code, content_hash)
+    
+    def trace(self, symbols, file_findings):
+        """Shortest call path from every reachable state-changing entry point to each tainted function"""
+        nodes = []
+        by_name = {}
+        by_file = {}
+        for file_path, file_symbols in symbols.items():
+            for symbol in file_symbols:
+                by_name.setdefault(symbol['name'], []).append(len(nodes))
+                by_file.setdefault(file_path, []).append(len(nodes))
+                nodes.append((file_path, symbol))
+        
+        # Calls resolve by name; an implementation in the caller's own contract wins
+        callers = [[] for _ in nodes]
+        edge_count = 0
+        for caller, (file_path, symbol) in enumerate(nodes):
+            for name in symbol['calls']:
+                targets = by_name.get(name, [])
+                local = [
+                    target for target in targets
+                    if nodes[target][0] == file_path and nodes[target][1]['contract'] == symbol['contract']
+                ]
+                for target in (local or targets):
+                    if target != caller:
+                        callers[target].append(caller)
+                        edge_count += 1
+        
+        sources = self._taint_sources(nodes, by_file, file_findings)
+        
+        paths = []
+        for source, finding in sources.items():
+            # Walk callers breadth-first so each sink gets its shortest path to this source
+            parent = {source: None}
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                if self._is_sink(nodes[node][1]):
+                    paths.append(self._taint_path(nodes, parent, node, source, finding))
+                for caller in callers[node]:
+                    if caller not in parent:
+                        parent[caller] = node
+                        queue.append(caller)
+        
+        paths.sort(key=lambda path: (-SEVERITY_ORDER.get(path['severity'], 0), len(path['path'])))
+        
+        return {
+            'functions': len(nodes),
+            'calls': edge_count,
+            'sources': len(sources),
+            'paths': paths
+        }
+    
+    def _taint_sources(self, nodes, by_file, file_findings):
+        """Map each function holding a spot-price finding to its most severe finding"""
+        sources = {}
+        for file_path, findings in file_findings.items():
+            file_nodes = by_file.get(file_path, [])
+            for finding in findings:
+                if finding.get('timed_out') or finding.get('severity') not in SEVERITY_ORDER:
+                    continue
+                
+                node = next((
+                    index for index in file_nodes
+                    if nodes[index][1]['start_line'] <= finding['line_number'] <= nodes[index][1]['end_line']
+                ), None)
+                if node is None:
+                    continue
+                
+                current = sources.get(node)
+                if current is None or SEVERITY_ORDER[finding['severity']] > SEVERITY_ORDER[current['severity']]:
+                    sources[node] = finding
+        return sources
+    
+    def _is_sink(self, symbol):
+        """Externally callable functions that may write state"""
+        return (
+            symbol['mutability'] not in ('view', 'pure')
+            and symbol['visibility'] in ('external', 'public', None)
+        )
+    
+    def _taint_path(self, nodes, parent, sink, source, finding):
+        """Describe the call chain from a sink down to the tainted source function"""
+        chain = []
+        node = sink
+        while node is not None:
+            chain.append(self._label(nodes[node][1]))
+            node = parent[node]
+        
+        sink_file, sink_symbol = nodes[sink]
+        source_file, _ = nodes[source]
+        return {
+            'sink': chain[0],
+            'sink_file': sink_file,
+            'sink_line': sink_symbol['start_line'],
+            'source': chain[-1],
+            'source_file': source_file,
+            'source_line': finding['line_number'],
+            'severity': finding['severity'],
+            'pattern': finding['pattern'],
+            'path': chain
+        }
+    
+    def _label(self, symbol):
+        return f"{symbol['contract']}.{symbol['name']}" if symbol['contract'] else symbol['name']
@@ -43,7 +43,7 @@ class RiskAssessor:
             'overall_score': risk_score,
             'risk_level': self._get_risk_level(risk_score),
             'factors': risk_factors,
-            'vulnerability_count': len(vulnerabilities),
+            'vulnerability_count': len([v for v in vulnerabilities if not v.get('timed_out')]),
             'critical_vulnerabilities': len([v for v in vulnerabilities if v['severity'] == 'CRITICAL'])
         }
     
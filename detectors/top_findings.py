@@ -0,0 +1,44 @@
+"""
+Bounded-memory Top-K Finding Ranking
+"""
+
+import heapq
+from itertools import count
+
+SEVERITY_ORDER = {'CRITICAL': 3, 'HIGH': 2, 'MEDIUM': 1}
+
+class TopFindings:
+    """Keeps the K most severe findings from a stream using a size-K heap"""
+    
+    def __init__(self, k=10, severities=None):
+        self.k = k
+        self.severities = set(severities) if severities else None
+        self.counts = {}
+        self.total = 0
+        self._heap = []
+        self._sequence = count()
+    
+    def add(self, finding):
+        """Offer one finding; only the K most severe (earliest first on ties) are kept"""
+        severity = finding.get('severity')
+        self.total += 1
+        self.counts[severity] = self.counts.get(severity, 0) + 1
+        
+        if self.k <= 0 or (self.severities and severity not in self.severities):
+            return
+        
+        # Negated sequence makes earlier findings win ties, matching a stable sort
+        entry = (SEVERITY_ORDER.get(severity, 0), -next(self._sequence), finding)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+    
+    def extend(self, findings):
+        for finding in findings:
+            self.add(finding)
+        return self
+    
+    def results(self):
+        """Kept findings, most severe first"""
+        return [finding for _, _, finding in sorted(self._heap, reverse=True)]
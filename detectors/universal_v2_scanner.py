@@ -3,38 +3,118 @@ Main Universal V2 Vulnerability Scanner
 """
 
 import os
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from config.settings import (
+    BATCH_SCAN_WORKERS, PROTOCOL_SCAN_TIMEOUT, PROTOCOL_MEMORY_LIMIT_MB, ENABLE_INCREMENTAL_SCANS,
+    ENABLE_PRICE_TAINT, TOP_FINDINGS_PER_PROTOCOL
+)
+from data.protocols.scan_state import ScanStateStore
+from data.protocols.call_graph_store import CallGraphStore
 from scanners.v2_detector import V2Detector
 from detectors.pattern_matcher import PatternMatcher
+from detectors.price_taint import PriceTaintAnalyzer
 from detectors.risk_assessor import RiskAssessor
+from detectors.top_findings import TopFindings
 from utils.logger import setup_logger
+from utils.git_source import open_snapshot
+from utils.git_utils import get_head, changed_files
 
 logger = setup_logger(__name__)
 
+def _scan_in_child(conn, protocol, repo_path, memory_limit_mb, options):
+    """Scan one protocol in a child process and send the result back"""
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"⚠️ Could not apply memory cap for {protocol.get('name')}: {e}")
+    
+    try:
+        conn.send(UniversalV2Scanner(**options).scan_protocol(protocol, repo_path))
+    finally:
+        conn.close()
+
 class UniversalV2Scanner:
-    def __init__(self):
+    def __init__(self, incremental=ENABLE_INCREMENTAL_SCANS, on_finding=None, price_taint=ENABLE_PRICE_TAINT,
+                 top_k=TOP_FINDINGS_PER_PROTOCOL):
+        # Child processes of a concurrent batch rebuild the scanner from these
+        self.options = {
+            'incremental': incremental, 'on_finding': on_finding, 'price_taint': price_taint, 'top_k': top_k
+        }
+        self.top_k = top_k
         self.v2_detector = V2Detector()
         self.pattern_matcher = PatternMatcher()
+        self.price_taint = PriceTaintAnalyzer(store=CallGraphStore() if incremental else None) if price_taint else None
         self.risk_assessor = RiskAssessor()
+        self.scan_state = ScanStateStore() if incremental else None
+        # Called as on_finding(protocol, finding) the moment each file's findings are ready
+        self.on_finding = on_finding
     
-    def scan_protocol(self, protocol, repo_path):
+    def scan_protocol(self, protocol, repo_path, snapshot=None):
         """Complete vulnerability scan for a protocol"""
         logger.info(f"🔍 Starting comprehensive scan for: {protocol.get('name')}")
         
-        scan_results = {
-            'protocol': protocol,
-            'v2_detection': None,
-            'vulnerabilities': [],
-            'risk_assessment': None,
-            'scan_summary': {}
-        }
+        # Load every source file once and share it between detectors
+        owns_snapshot = snapshot is None
+        if owns_snapshot:
+            snapshot = open_snapshot(repo_path)
+        
+        scan_results = self._empty_results(protocol, repo_path)
         
         try:
+            # Pick up edited rule packs before deciding what stored results are still valid
+            self.v2_detector.refresh_rules()
+            self.pattern_matcher.refresh_rules()
+            
+            # Reuse per-file results from the last scanned commit for untouched files
+            # A git-sourced snapshot pins the commit it reads; a working tree is compared against HEAD
+            head = (snapshot.commit or get_head(repo_path)) if self.scan_state else None
+            known_indicators, known_findings, scan_results['incremental'] = self._incremental_baseline(
+                repo_path, head, snapshot.commit
+            )
+            
             # Step 1: Detect V2 AMM usage
-            scan_results['v2_detection'] = self.v2_detector.detect_v2_usage(repo_path)
+            logger.info(f"🔍 Scanning for V2 AMM usage in: {repo_path}")
+            file_indicators = self.v2_detector.analyze_files(snapshot, known_indicators)
+            scan_results['v2_detection'] = self.v2_detector.summarize(file_indicators)
+            
+            # Files the enumeration settings left out have no findings, not a clean bill
+            scan_results['skipped_files'] = list(snapshot.skipped_files)
+            if scan_results['skipped_files']:
+                logger.warning(f"⚠️ {len(scan_results['skipped_files'])} generated/oversized files not scanned "
+                               f"in {protocol.get('name')}")
             
             # Step 2: Only scan for vulnerabilities if V2 usage detected
+            file_findings = None
             if scan_results['v2_detection']['confidence_score'] > 30:
-                scan_results['vulnerabilities'] = self.pattern_matcher.scan_repository(repo_path)
+                logger.info(f"🔍 Scanning repository for vulnerabilities: {repo_path}")
+                file_findings = {}
+                # Ranked as files finish, so displaying the worst findings needs no pass over the full list
+                top_findings = TopFindings(self.top_k)
+                for file_path, findings in self.pattern_matcher.iter_file_findings(snapshot, known_findings):
+                    file_findings[file_path] = findings
+                    top_findings.extend(findings)
+                    if self.on_finding:
+                        for finding in findings:
+                            self.on_finding(protocol, finding)
+                scan_results['top_findings'] = top_findings.results()
+                scan_results['vulnerabilities'] = self.pattern_matcher.flatten_findings(file_findings)
+                
+                # Step 2b: Follow spot-price findings up the call graph to state-changing entry points
+                if self.price_taint:
+                    scan_results['price_taint'] = self.price_taint.analyze(
+                        repo_path, snapshot, file_findings, head,
+                        source_ruleset=self.pattern_matcher.ruleset_version,
+                        unchanged=scan_results['incremental']['mode'] == 'unchanged'
+                    )
+            
+            if head:
+                self.scan_state.save(repo_path, head, file_indicators, file_findings, self._ruleset_versions())
             
             # Step 3: Risk assessment
             scan_results['risk_assessment'] = self.risk_assessor.assess_protocol_risk(
@@ -51,7 +131,74 @@ class UniversalV2Scanner:
         except Exception as e:
             logger.error(f"❌ Scan failed for {protocol.get('name')}: {e}")
             scan_results['error'] = str(e)
+        finally:
+            if owns_snapshot:
+                snapshot.release()
+        
+        return scan_results
+    
+    def _incremental_baseline(self, repo_path, head, snapshot_commit=None):
+        """Stored per-file results still valid at HEAD (or the snapshot's commit), plus a description of the scan mode"""
+        state = self.scan_state.load(repo_path) if head else None
+        if not state or not state.get('commit'):
+            return {}, {}, {'mode': 'full', 'commit': head}
+        
+        if state.get('ruleset') != self._ruleset_versions():
+            logger.info(f"🔁 Rules changed since the last scan of {repo_path} - full rescan")
+            return {}, {}, {'mode': 'full', 'commit': head}
+        
+        changed = changed_files(repo_path, state['commit'], snapshot_commit)
+        if changed is None:
+            # Base commit is gone (force push, shallow history) - rescan everything
+            logger.info(f"🔁 Previous commit not available for {repo_path} - full rescan")
+            return {}, {}, {'mode': 'full', 'commit': head}
+        
+        changed_paths = {os.path.join(repo_path, rel_path) for rel_path in changed}
+        known_indicators = {
+            file_path: indicators for file_path, indicators in state['file_indicators'].items()
+            if file_path not in changed_paths
+        }
+        known_findings = {
+            file_path: findings for file_path, findings in (state['file_findings'] or {}).items()
+            if file_path not in changed_paths
+        }
         
+        if state['commit'] == head and not changed:
+            logger.info(f"⏭️ HEAD unchanged for {repo_path} - reusing stored results")
+            mode = 'unchanged'
+        else:
+            logger.info(f"🔁 Incremental rescan of {repo_path}: {len(changed)} changed files since {state['commit'][:8]}")
+            mode = 'incremental'
+        
+        return known_indicators, known_findings, {
+            'mode': mode,
+            'commit': head,
+            'base_commit': state['commit'],
+            'changed_files': len(changed)
+        }
+    
+    def _ruleset_versions(self):
+        """Versions of the rules that produced stored per-file results"""
+        return {
+            'v2_detector': self.v2_detector.ruleset_version,
+            'pattern_matcher': self.pattern_matcher.ruleset_version
+        }
+    
+    def _empty_results(self, protocol, repo_path, error=None):
+        """Scan result skeleton, optionally marked as failed"""
+        scan_results = {
+            'protocol': protocol,
+            'repo_path': repo_path,
+            'v2_detection': None,
+            'vulnerabilities': [],
+            'top_findings': [],
+            'skipped_files': [],
+            'price_taint': None,
+            'risk_assessment': None,
+            'scan_summary': {}
+        }
+        if error:
+            scan_results['error'] = error
         return scan_results
     
     def _generate_summary(self, scan_results):
@@ -62,30 +209,113 @@ class UniversalV2Scanner:
         critical_count = len([v for v in vulnerabilities if v['severity'] == 'CRITICAL'])
         high_count = len([v for v in vulnerabilities if v['severity'] == 'HIGH'])
         medium_count = len([v for v in vulnerabilities if v['severity'] == 'MEDIUM'])
+        timed_out_count = len([v for v in vulnerabilities if v.get('timed_out')])
         
         return {
-            'total_vulnerabilities': len(vulnerabilities),
+            'total_vulnerabilities': len(vulnerabilities) - timed_out_count,
             'critical_vulnerabilities': critical_count,
             'high_vulnerabilities': high_count,
             'medium_vulnerabilities': medium_count,
+            'timed_out_rules': timed_out_count,
+            'skipped_files': len(scan_results.get('skipped_files', [])),
+            'price_taint_paths': len((scan_results.get('price_taint') or {}).get('paths', [])),
             'v2_confidence': v2_detection.get('confidence_score', 0),
             'amm_type': v2_detection.get('amm_type', 'UNKNOWN'),
             'v2_files_found': len(v2_detection.get('v2_files', [])),
             'scan_timestamp': scan_results['risk_assessment'].get('scan_timestamp') if scan_results['risk_assessment'] else None
         }
     
-    def batch_scan_protocols(self, protocols_with_repos):
+    def batch_scan_protocols(self, protocols_with_repos, workers=BATCH_SCAN_WORKERS):
         """Scan multiple protocols in batch"""
         results = []
         
+        for result in self.iter_scan_protocols(protocols_with_repos, workers):
+            results.append(result)
+        
+        # Restore input order first so ties don't depend on completion order
+        positions = {repo_path: i for i, (_, repo_path) in enumerate(protocols_with_repos)}
+        results.sort(key=lambda x: positions.get(x.get('repo_path'), 0))
+        
+        # Sort by risk score (highest first)
+        results.sort(key=lambda x: (x.get('risk_assessment') or {}).get('overall_score', 0), reverse=True)
+        
+        return results
+    
+    def iter_scan_protocols(self, protocols_with_repos, workers=BATCH_SCAN_WORKERS,
+                            timeout=PROTOCOL_SCAN_TIMEOUT, memory_limit_mb=PROTOCOL_MEMORY_LIMIT_MB):
+        """Yield each protocol's scan_results as soon as it completes"""
+        valid = []
         for protocol, repo_path in protocols_with_repos:
             if repo_path and os.path.exists(repo_path):
-                result = self.scan_protocol(protocol, repo_path)
-                results.append(result)
+                valid.append((protocol, repo_path))
             else:
                 logger.warning(f"⚠️ Skipping {protocol.get('name')} - no valid repository")
         
-        # Sort by risk score (highest first)
-        results.sort(key=lambda x: x.get('risk_assessment', {}).get('overall_score', 0), reverse=True)
+        if workers <= 1:
+            for protocol, repo_path in valid:
+                yield self.scan_protocol(protocol, repo_path)
+            return
         
-        return results
+        yield from self._concurrent_scan(valid, workers, timeout, memory_limit_mb)
+    
+    def _concurrent_scan(self, protocols_with_repos, workers, timeout, memory_limit_mb):
+        """Scan protocols in capped child processes, largest repositories first"""
+        # Starting the biggest repos first keeps one giant repo from finishing last
+        sized = []
+        for protocol, repo_path in protocols_with_repos:
+            snapshot = open_snapshot(repo_path)
+            sized.append((snapshot.source_bytes(), protocol, repo_path))
+            snapshot.release()
+        sized.sort(key=lambda item: item[0], reverse=True)
+        pending = deque(sized)
+        running = {}
+        
+        try:
+            while pending or running:
+                while pending and len(running) < workers:
+                    size, protocol, repo_path = pending.popleft()
+                    logger.info(f"🚀 Scheduling {protocol.get('name')} ({size / 1024:.0f} KB of Solidity)")
+                    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+                    process = multiprocessing.Process(
+                        target=_scan_in_child,
+                        args=(child_conn, protocol, repo_path, memory_limit_mb, self.options)
+                    )
+                    process.start()
+                    child_conn.close()
+                    deadline = time.monotonic() + timeout if timeout else None
+                    running[parent_conn] = (process, protocol, repo_path, deadline)
+                
+                deadlines = [entry[3] for entry in running.values() if entry[3] is not None]
+                wait_time = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                
+                for conn in wait(list(running), timeout=wait_time):
+                    process, protocol, repo_path, _ = running.pop(conn)
+                    try:
+                        result = conn.recv()
+                    except EOFError:
+                        result = None
+                    conn.close()
+                    process.join()
+                    
+                    if result is None:
+                        logger.error(f"❌ Scan process died for {protocol.get('name')} (exit code {process.exitcode})")
+                        result = self._empty_results(
+                            protocol, repo_path, f"Scan process exited with code {process.exitcode}"
+                        )
+                    yield result
+                
+                now = time.monotonic()
+                for conn, (process, protocol, repo_path, deadline) in list(running.items()):
+                    if deadline is not None and now >= deadline:
+                        running.pop(conn)
+                        process.kill()
+                        process.join()
+                        conn.close()
+                        logger.error(f"⏰ Scan timeout for {protocol.get('name')} after {timeout}s")
+                        yield self._empty_results(protocol, repo_path, f"Scan exceeded {timeout}s wall-clock cap")
+        finally:
+            # Generator closed early - don't leave scans running
+            for conn, (process, _, _, _) in running.items():
+                process.kill()
+                process.join()
+                conn.close()
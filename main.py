@@ -14,13 +14,29 @@ from scanners.fork_target_discoverer import ForkTargetDiscoverer
 from scanners.repo_cloner import RepoCloner
 from detectors.universal_v2_scanner import UniversalV2Scanner
 from utils.logger import setup_logger
+from utils.git_source import open_snapshot
+from utils.rule_packs import default_ruleset_loader, classify_finding
 
 logger = setup_logger(__name__)
 
+def print_live_finding(protocol, finding):
+    """Print CRITICAL/HIGH findings as soon as the scanner produces them"""
+    if finding.get('severity') in ('CRITICAL', 'HIGH'):
+        print(f"   🚨 [{protocol.get('name', 'Unknown')}] {finding['severity']}: "
+              f"{finding.get('file', 'Unknown')}:{finding.get('line_number', '?')}")
+
 class FocusedVulnerabilityAnalyzer:
     """Focused analysis showing detailed vulnerability info in terminal"""
     
-    def analyze_vulnerability(self, vulnerability, file_content=None):
+    def __init__(self, ruleset_loader=None):
+        # Classification and vulnerability details come from the rule packs
+        self.ruleset_loader = ruleset_loader or default_ruleset_loader()
+    
+    def analyze_vulnerability(self, vulnerability, file_content=None, snapshot=None):
+        if file_content is None and snapshot is not None:
+            # Pools are looked up in the code view so commented-out pairs are ignored
+            file_content = snapshot.code_view(vulnerability.get('file', ''))
+        
         analysis = vulnerability.copy()
         
         # Determine specific vulnerability type
@@ -32,60 +48,16 @@ class FocusedVulnerabilityAnalyzer:
         return analysis
     
     def _classify_vulnerability(self, vulnerability, file_content):
-        pattern = vulnerability.get('pattern', '')
-        matched_text = vulnerability.get('matched_text', '')
-        line_content = vulnerability.get('line_content', '')
-        
-        if 'getReserves()' in pattern:
-            if 'view' in line_content or 'returns' in line_content:
-                return 'direct_reserves_oracle'
-            else:
-                return 'reserves_manipulation'
-        elif 'token0()' in pattern and 'token1()' in pattern and '/' in matched_text:
-            return 'token_division_oracle'
-        elif 'balanceOf' in pattern and '0x' in matched_text:
-            return 'balance_manipulation'
-        
-        return 'amm_price_manipulation'
+        # Findings stored before rule ids existed are matched to their rule by pattern
+        rule = self.ruleset_loader.rule(vulnerability.get('rule_id'))
+        if rule is None:
+            rule = next((
+                r for r in self.ruleset_loader.ruleset['rules'] if r['pattern'] == vulnerability.get('pattern')
+            ), None)
+        return classify_finding(rule, vulnerability)
     
     def _get_vulnerability_details(self, vuln_type):
-        details_map = {
-            'direct_reserves_oracle': {
-                'name': 'Direct Reserves Price Oracle',
-                'type': 'CRITICAL - Oracle Manipulation',
-                'exploit_scenario': 'Flash loan to manipulate pool reserves and exploit price-dependent functions',
-                'affected_contracts': ['Price Oracles', 'Lending Protocols', 'Yield Farms'],
-                'impact': 'HIGH - Fund theft through price manipulation'
-            },
-            'reserves_manipulation': {
-                'name': 'Reserves-Based Price Calculation', 
-                'type': 'CRITICAL - Economic Attack',
-                'exploit_scenario': 'Large swaps to manipulate spot prices for arbitrage or collateral exploitation',
-                'affected_contracts': ['AMM Pairs', 'Router Contracts', 'Price Feeds'],
-                'impact': 'HIGH - Economic exploitation'
-            },
-            'token_division_oracle': {
-                'name': 'Manual Token Price Calculation',
-                'type': 'CRITICAL - Price Oracle',
-                'exploit_scenario': 'Manipulate token ratios to create false pricing for DeFi operations',
-                'affected_contracts': ['Custom Oracles', 'Price Calculators', 'Swap Functions'],
-                'impact': 'HIGH - Direct price manipulation'
-            },
-            'balance_manipulation': {
-                'name': 'Raw Balance Manipulation',
-                'type': 'HIGH - Economic Attack', 
-                'exploit_scenario': 'Temporarily inflate pool balances to manipulate derived values',
-                'affected_contracts': ['Liquidity Pools', 'Balance Checks', 'Value Calculations'],
-                'impact': 'MEDIUM-HIGH - Economic attacks'
-            },
-            'amm_price_manipulation': {
-                'name': 'AMM Price Manipulation',
-                'type': 'CRITICAL - DeFi Exploit', 
-                'exploit_scenario': 'Standard AMM price manipulation through large swaps',
-                'affected_contracts': ['AMM Contracts', 'Price Feeds'],
-                'impact': 'HIGH - Economic loss'
-            }
-        }
+        details_map = self.ruleset_loader.ruleset['vulnerability_types']
         
         return details_map.get(vuln_type, {
             'name': 'AMM Vulnerability',
@@ -115,7 +87,7 @@ class SeekProResearchEnhanced:
     def __init__(self):
         self.fork_discoverer = ForkTargetDiscoverer()
         self.repo_cloner = RepoCloner()
-        self.v2_scanner = UniversalV2Scanner()
+        self.v2_scanner = UniversalV2Scanner(on_finding=print_live_finding)
         self.vuln_analyzer = FocusedVulnerabilityAnalyzer()
     
     def scan_all_forks(self):
@@ -125,17 +97,16 @@ class SeekProResearchEnhanced:
         targets = self.fork_discoverer.get_fork_targets()
         print(f"🎯 Scanning {len(targets)} Uniswap V2 forks...")
         
-        protocols_with_repos = []
-        for target in targets:
-            protocol = {
+        protocols = [
+            {
                 'name': target['name'],
                 'github': target['github'],
                 'type': target['type'],
                 'risk_priority': target['risk_priority']
             }
-            repo_path = self.repo_cloner.clone_or_update_repo(protocol)
-            if repo_path:
-                protocols_with_repos.append((protocol, repo_path))
+            for target in targets
+        ]
+        protocols_with_repos = self.repo_cloner.batch_clone_protocols(protocols)
         
         scan_results = self.v2_scanner.batch_scan_protocols(protocols_with_repos)
         self._display_enhanced_analysis(scan_results)
@@ -148,26 +119,26 @@ class SeekProResearchEnhanced:
         
         for result in scan_results:
             protocol = result.get('protocol', {})
-            vulnerabilities = result.get('vulnerabilities', [])
+            # Ranked by the scanner while findings streamed in; the most severe come first
+            critical_vulns = [
+                vuln for vuln in result.get('top_findings', []) if vuln.get('severity') in ('CRITICAL', 'HIGH')
+            ]
             
-            if not vulnerabilities:
+            if not critical_vulns:
                 continue
                 
             print(f"\n🔴 PROTOCOL: {protocol.get('name', 'Unknown')}")
             print("-" * 50)
             
-            critical_vulns = [v for v in vulnerabilities if v.get('severity') in ['CRITICAL', 'HIGH']]
+            # Findings cluster in a few files - read each of them once
+            snapshot = open_snapshot(result.get('repo_path', ''), mode='text')
             
-            for i, vuln in enumerate(critical_vulns[:10]):
-                try:
-                    with open(vuln.get('file', ''), 'r') as f:
-                        file_content = f.read()
-                    enhanced_vuln = self.vuln_analyzer.analyze_vulnerability(vuln, file_content)
-                except:
-                    enhanced_vuln = self.vuln_analyzer.analyze_vulnerability(vuln)
+            for i, vuln in enumerate(critical_vulns):
+                enhanced_vuln = self.vuln_analyzer.analyze_vulnerability(vuln, snapshot=snapshot)
                 
                 print(f"\n💀 VULNERABILITY #{i+1}:")
                 print(f"   📍 File: {vuln.get('file', 'Unknown')}:{vuln.get('line_number', '?')}")
+                print(f"   🆔 Rule: {vuln.get('rule_id') or 'Unknown'}")
                 print(f"   🏷️  Name: {enhanced_vuln.get('name', 'Unknown')}")
                 print(f"   🔧 Type: {enhanced_vuln.get('type', 'Unknown')}")
                 print(f"   ⚠️  Impact: {enhanced_vuln.get('impact', 'Unknown')}")
@@ -180,6 +151,15 @@ class SeekProResearchEnhanced:
                     print(f"   📝 Code: {line_content.strip()}")
                 
                 print("   " + "-" * 40)
+            
+            snapshot.release()
+            
+            taint_paths = (result.get('price_taint') or {}).get('paths', [])
+            if taint_paths:
+                print(f"\n🧬 SPOT-PRICE TAINT PATHS ({len(taint_paths)}):")
+                for path in taint_paths[:10]:
+                    print(f"   [{path['severity']}] {' -> '.join(path['path'])}")
+                    print(f"      📍 Source: {path['source_file']}:{path['source_line']}")
 
 def main():
     scanner = SeekProResearchEnhanced()
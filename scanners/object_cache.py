@@ -0,0 +1,122 @@
+"""
+Shared Git Object Store Borrowed by Every Fork Clone
+"""
+
+import os
+import re
+import time
+import shutil
+import threading
+import subprocess
+from config.settings import OBJECT_CACHE_DIR, OBJECT_CACHE_GC_INTERVAL, OBJECT_CACHE_PRUNE, CLONE_TIMEOUT
+from utils.git_utils import run_git, get_head
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class SharedObjectCache:
+    """Bare repository whose objects all clones reach through their alternates file"""
+    
+    def __init__(self, cache_dir=OBJECT_CACHE_DIR, gc_interval=OBJECT_CACHE_GC_INTERVAL, prune=OBJECT_CACHE_PRUNE):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.gc_interval = gc_interval
+        self.prune = prune
+        # Shallow fetches into one repository can't run at once (shallow.lock)
+        self.lock = threading.Lock()
+    
+    def _ensure(self):
+        if not os.path.isdir(self.objects_dir):
+            subprocess.run(['git', 'init', '-q', '--bare', self.cache_dir], capture_output=True, text=True)
+            # Only the explicit, borrower-aware gc below may prune this store
+            run_git(self.cache_dir, 'config', 'gc.auto', '0')
+    
+    def ref_name(self, repo_path):
+        """Cache ref that keeps a borrower's objects alive"""
+        return 'refs/forks/' + re.sub(r'[^\w.-]', '_', os.path.basename(os.path.normpath(repo_path)))
+    
+    def fetch(self, url, repo_path, timeout=CLONE_TIMEOUT, head=None):
+        """Fetch a remote's HEAD into the cache, or just point the fork's ref at it when the cache already has it"""
+        with self.lock:
+            self._ensure()
+            ref = self.ref_name(repo_path)
+            if head and run_git(self.cache_dir, 'cat-file', '-e', f'{head}^{{commit}}') is not None:
+                # Another fork at the same commit brought every object already
+                result = run_git(self.cache_dir, 'update-ref', ref, head)
+                return subprocess.CompletedProcess([], 0 if result is not None else 1, '', '')
+            
+            # Negotiation is per commit: a shallow fetch only skips objects reachable from a commit
+            # both sides have, so forks with unrelated history download their whole tree again
+            # (identical blobs are stored once after the next gc repacks the cache)
+            return subprocess.run(
+                ['git', '-C', self.cache_dir, 'fetch', '--depth', '1', '--no-tags', url, f'+HEAD:{ref}'],
+                capture_output=True, text=True, timeout=timeout
+            )
+    
+    def borrow(self, git_dir):
+        """Point a repository's object lookups at the cache"""
+        alternates = os.path.join(git_dir, 'objects', 'info', 'alternates')
+        os.makedirs(os.path.dirname(alternates), exist_ok=True)
+        with open(alternates, 'w') as f:
+            f.write(self.objects_dir + '\n')
+        
+        # Borrowed history is shallow; without the cache's boundaries, walks run into missing parents
+        shallow = os.path.join(self.cache_dir, 'shallow')
+        if os.path.exists(shallow):
+            shutil.copyfile(shallow, os.path.join(git_dir, 'shallow'))
+    
+    def borrows(self, repo_path):
+        """Whether repo_path reads objects from this cache"""
+        objects_dir = run_git(repo_path, 'rev-parse', '--git-path', 'objects')
+        if not objects_dir:
+            return False
+        alternates = os.path.join(repo_path, objects_dir.strip(), 'info', 'alternates')
+        try:
+            with open(alternates, 'r') as f:
+                return self.objects_dir in f.read().splitlines()
+        except OSError:
+            return False
+    
+    def gc_due(self):
+        """Whether the last collection is older than gc_interval"""
+        stamp = os.path.join(self.cache_dir, 'last-gc')
+        try:
+            return time.time() - os.path.getmtime(stamp) >= self.gc_interval
+        except OSError:
+            return os.path.isdir(self.objects_dir)
+    
+    def gc(self, repo_paths):
+        """Prune objects no live borrower can reach, after re-anchoring every borrower's HEAD"""
+        with self.lock:
+            live = set()
+            for repo_path in repo_paths:
+                if not self.borrows(repo_path):
+                    continue
+                ref = self.ref_name(repo_path)
+                live.add(ref)
+                head = get_head(repo_path)
+                if head is None:
+                    continue
+                
+                if run_git(self.cache_dir, 'cat-file', '-e', f'{head}^{{commit}}') is None:
+                    # The borrower moved on its own (e.g. a merge on pull) - copy its objects in first
+                    run_git(self.cache_dir, 'fetch', '--no-tags', os.path.abspath(repo_path), f'+HEAD:{ref}',
+                            timeout=CLONE_TIMEOUT)
+                else:
+                    run_git(self.cache_dir, 'update-ref', ref, head)
+                
+                # Old reflog entries would point at objects pruned below; duplicates of cache objects go too
+                run_git(repo_path, 'reflog', 'expire', '--expire=now', '--all')
+                run_git(repo_path, 'repack', '-a', '-d', '-l', '-q', timeout=CLONE_TIMEOUT)
+            
+            refs = (run_git(self.cache_dir, 'for-each-ref', '--format=%(refname)', 'refs/forks/') or '').split()
+            for ref in refs:
+                if ref not in live:
+                    run_git(self.cache_dir, 'update-ref', '-d', ref)
+            
+            result = run_git(self.cache_dir, 'gc', '-q', f'--prune={self.prune}', timeout=CLONE_TIMEOUT)
+            if result is not None:
+                with open(os.path.join(self.cache_dir, 'last-gc'), 'w'):
+                    pass
+                logger.info(f"🧹 Collected shared object cache: {len(live)} borrowers, {len(refs) - len(live & set(refs))} refs dropped")
+            return result is not None
@@ -2,21 +2,31 @@
 DeFi Llama Protocol Discovery Engine - FIXED VERSION
 """
 
-import requests
 import json
+import asyncio
 from datetime import datetime, timedelta
-from config.settings import DEFI_LLAMA_ENDPOINTS, RISK_THRESHOLDS
+from config.settings import (
+    DEFI_LLAMA_ENDPOINTS, RISK_THRESHOLDS, PROTOCOL_FIELDS, ENRICH_PROTOCOL_DETAILS, PROTOCOL_DETAIL_FIELDS
+)
+from utils.api_client import SmartAPIClient
+from utils.async_api_client import AsyncAPIClient
+from utils.json_stream import iter_json_array
 
 class ProtocolDiscoverer:
     def __init__(self):
-        self.session = requests.Session()
+        # Rate-limited and cached, so an unchanged protocol list comes back as a 304
+        self.api = SmartAPIClient()
+    
+    def iter_protocols(self):
+        """Yield DeFi Llama protocols one at a time as the list is parsed, never holding the whole payload"""
+        for protocol in iter_json_array(self.api.stream(DEFI_LLAMA_ENDPOINTS['all_protocols'])):
+            if isinstance(protocol, dict):
+                yield protocol
     
     def get_all_protocols(self):
         """Get all protocols from DeFi Llama"""
         try:
-            response = self.session.get(DEFI_LLAMA_ENDPOINTS['all_protocols'], timeout=30)
-            response.raise_for_status()
-            return response.json()
+            return list(self.iter_protocols())
         except Exception as e:
             print(f"❌ Error fetching protocols from DeFi Llama: {e}")
             return []
@@ -25,17 +35,50 @@ class ProtocolDiscoverer:
         """Discover new high-risk protocols"""
         print("🔍 Discovering high-risk protocols from DeFi Llama...")
         
-        all_protocols = self.get_all_protocols()
         high_risk_protocols = []
-        
-        for protocol in all_protocols:
-            if self._is_high_risk_target(protocol):
-                enhanced_protocol = self._enhance_protocol_data(protocol)
-                high_risk_protocols.append(enhanced_protocol)
+        try:
+            # Each protocol is checked as it is parsed; only the survivors' used fields stay in memory
+            for protocol in self.iter_protocols():
+                if self._is_high_risk_target(protocol):
+                    enhanced_protocol = self._enhance_protocol_data(protocol)
+                    high_risk_protocols.append(enhanced_protocol)
+        except Exception as e:
+            print(f"❌ Error fetching protocols from DeFi Llama: {e}")
+            # A partial list would skew toward the protocols listed first
+            high_risk_protocols = []
         
         print(f"✅ Found {len(high_risk_protocols)} high-risk protocols")
+        
+        if ENRICH_PROTOCOL_DETAILS and high_risk_protocols:
+            self.enrich_protocols(high_risk_protocols)
         return high_risk_protocols
     
+    def enrich_protocols(self, protocols, endpoint=DEFI_LLAMA_ENDPOINTS['protocol_details'], client=None):
+        """Attach selected protocol_details fields as protocol['details'], fetching all candidates concurrently"""
+        print(f"🔎 Fetching details for {len(protocols)} protocols...")
+        slugged = [protocol for protocol in protocols if protocol.get('slug')]
+        urls = [endpoint.format(protocol['slug']) for protocol in slugged]
+        
+        details = asyncio.run(self._fetch_details(urls, client or AsyncAPIClient(rate_limiter=self.api.rate_limiter)))
+        
+        enriched = 0
+        for protocol, detail in zip(slugged, details):
+            if detail is not None:
+                protocol['details'] = detail
+                enriched += 1
+        print(f"✅ Enriched {enriched}/{len(protocols)} protocols")
+        return protocols
+    
+    async def _fetch_details(self, urls, client):
+        async with client:
+            return await client.fetch_all(urls, transform=self._detail_fields)
+    
+    def _detail_fields(self, details):
+        """Keep only the configured fields of a protocol_details payload"""
+        if not isinstance(details, dict):
+            return None
+        return {field: details[field] for field in PROTOCOL_DETAIL_FIELDS if field in details}
+    
     def _is_high_risk_target(self, protocol):
         """Check if protocol meets high-risk criteria - FIXED VERSION"""
         # Safely get listedAt with default
@@ -77,7 +120,7 @@ class ProtocolDiscoverer:
     
     def _enhance_protocol_data(self, protocol):
         """Enhance protocol data with calculated fields - FIXED VERSION"""
-        enhanced = protocol.copy()
+        enhanced = {field: protocol[field] for field in PROTOCOL_FIELDS if field in protocol}
         
         # Calculate age in days safely
         listed_at = protocol.get('listedAt') or 0
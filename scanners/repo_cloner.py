@@ -3,10 +3,23 @@ GitHub Repository Management and Cloning - FIXED VERSION
 """
 
 import os
+import heapq
+import shutil
 import subprocess
 import requests
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
 from utils.logger import setup_logger
 from config.api_config import get_github_token, get_delay
+from config.settings import (
+    BARE_CLONES, CLONE_WORKERS, CLONE_PER_HOST_LIMIT, CLONE_TIMEOUT, UPDATE_TIMEOUT,
+    CLONE_RETRIES, CLONE_RETRY_BACKOFF, PARTIAL_CLONES, SPARSE_CHECKOUT_PATTERNS, SPARSE_EXTRA_PATHS,
+    SHARED_OBJECT_CACHE, SKIP_UNCHANGED_REMOTES, REMOTE_PROBE_WORKERS, REMOTE_PROBE_TIMEOUT
+)
+from scanners.object_cache import SharedObjectCache
+from data.protocols.update_log import UpdateLogStore
+from utils.git_utils import get_head, run_git, is_bare_repo
 import time
 
 logger = setup_logger(__name__)
@@ -16,9 +29,22 @@ class RepoCloner:
         self.base_dir = "data/protocols/repos/"
         os.makedirs(self.base_dir, exist_ok=True)
         self.github_token = get_github_token()
+        # repo_path -> {'previous_head', 'current_head', 'remote_head', 'decision'} for the current batch
+        self.repo_heads = {}
+        # repo_path -> remote HEAD from the batch's up-front probe
+        self.remote_heads = {}
+        self.update_log = UpdateLogStore()
+        self.object_cache = SharedObjectCache() if SHARED_OBJECT_CACHE else None
     
     def clone_or_update_repo(self, protocol):
         """Clone or update a protocol repository - FIXED VERSION"""
+        target = self._repo_target(protocol)
+        if target is None:
+            return None
+        return self._sync_repo(*target)[0]
+    
+    def _repo_target(self, protocol):
+        """(github_url, repo_path) for a protocol, or None without a usable URL"""
         github_url = protocol.get('github')
         
         # FIX: Handle cases where github is a list or invalid format
@@ -33,8 +59,11 @@ class RepoCloner:
             return None
         
         repo_name = self._extract_repo_name(github_url)
-        repo_path = os.path.join(self.base_dir, repo_name)
-        
+        return github_url, os.path.join(self.base_dir, repo_name)
+    
+    def _sync_repo(self, github_url, repo_path):
+        """Clone or update one repository; returns (repo_path, failed)"""
+        repo_name = os.path.basename(repo_path)
         if os.path.exists(repo_path):
             logger.info(f"🔄 Updating existing repo: {repo_name}")
             return self._update_repo(repo_path)
@@ -42,6 +71,13 @@ class RepoCloner:
             logger.info(f"📥 Cloning new repo: {repo_name}")
             return self._clone_repo(github_url, repo_path)
     
+    def _host(self, github_url):
+        """Host a clone URL talks to, for https and scp-style git URLs"""
+        host = urlparse(github_url).hostname
+        if host is None and '@' in github_url:
+            host = github_url.split('@', 1)[1].split(':', 1)[0]
+        return host or github_url
+    
     def _extract_repo_name(self, github_url):
         """Extract repository name from GitHub URL - FIXED VERSION"""
         if not isinstance(github_url, str):
@@ -64,61 +100,319 @@ class RepoCloner:
             else:
                 auth_url = url
             
-            result = subprocess.run(
-                ['git', 'clone', '--depth', '1', auth_url, path],
-                capture_output=True, text=True, timeout=300
-            )
+            sparse = PARTIAL_CLONES and not BARE_CLONES
+            if self.object_cache:
+                result = self._clone_with_cache(auth_url, path, sparse)
+            else:
+                result = self._clone_from_remote(url, auth_url, path, sparse)
             
             if result.returncode == 0:
                 logger.info(f"✅ Successfully cloned: {path}")
-                return path
+                self.repo_heads[path] = {'previous_head': None, 'current_head': get_head(path), 'decision': 'cloned'}
+                return path, False
             else:
                 logger.error(f"❌ Failed to clone {url}: {result.stderr}")
-                return None
+                self.repo_heads[path] = {'previous_head': None, 'current_head': None, 'decision': 'clone_failed'}
+                # A clone that failed after creating its directory must not be kept as a repo
+                shutil.rmtree(path, ignore_errors=True)
+                return None, True
                 
         except subprocess.TimeoutExpired:
             logger.error(f"⏰ Clone timeout for: {url}")
-            return None
+            # A killed clone leaves a partial directory that would later be mistaken for a repo
+            shutil.rmtree(path, ignore_errors=True)
+            return None, True
         except Exception as e:
             logger.error(f"❌ Error cloning {url}: {e}")
-            return None
+            return None, True
+    
+    def _clone_from_remote(self, url, auth_url, path, sparse):
+        """Shallow clone straight from the remote; returns the last git result"""
+        # Bare clones skip the checkout; scans read their blobs from the object store
+        command = ['git', 'clone', '--depth', '1']
+        if BARE_CLONES:
+            command.append('--bare')
+        elif sparse:
+            # Only trees come down here; the sparse checkout then fetches just the blobs it keeps
+            command += ['--filter=blob:none', '--no-checkout']
+        result = subprocess.run(
+            command + [auth_url, path],
+            capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        )
+        
+        if result.returncode != 0 and sparse and 'filter' in result.stderr:
+            logger.warning(f"⚠️ Partial clone rejected for {url} - retrying with a full clone")
+            shutil.rmtree(path, ignore_errors=True)
+            result = subprocess.run(
+                ['git', 'clone', '--depth', '1', '--no-checkout', auth_url, path],
+                capture_output=True, text=True, timeout=CLONE_TIMEOUT
+            )
+        
+        if result.returncode == 0 and sparse:
+            if 'filtering not recognized' in result.stderr:
+                # Servers without filter support send every blob, but the checkout stays sparse
+                logger.info(f"ℹ️ {url} does not support partial clone - downloaded all blobs")
+            result = self._sparse_checkout(path)
+        return result
+    
+    def _clone_with_cache(self, auth_url, path, sparse):
+        """Fetch into the shared object cache, then build the clone locally on top of it"""
+        result = subprocess.run(
+            ['git', 'ls-remote', '--symref', auth_url, 'HEAD'],
+            capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        )
+        if result.returncode != 0:
+            return result
+        # "ref: refs/heads/main\tHEAD" then "<oid>\tHEAD"
+        branch = next((
+            line.split()[1][len('refs/heads/'):] for line in result.stdout.splitlines()
+            if line.startswith('ref: refs/heads/')
+        ), 'main')
+        head = next((
+            line.split()[0] for line in result.stdout.splitlines()
+            if line.endswith('\tHEAD') and not line.startswith('ref: ')
+        ), None)
+        
+        result = self.object_cache.fetch(auth_url, path, head=head)
+        if result.returncode != 0:
+            return result
+        
+        result = subprocess.run(
+            ['git', 'init', '-q'] + (['--bare'] if BARE_CLONES else []) + [path],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return result
+        self.object_cache.borrow(path if BARE_CLONES else os.path.join(path, '.git'))
+        run_git(path, 'remote', 'add', 'origin', auth_url)
+        
+        # Every object is already reachable through the alternates file, so this copies nothing
+        local_ref = f'refs/heads/{branch}' if BARE_CLONES else f'refs/remotes/origin/{branch}'
+        result = subprocess.run(
+            ['git', '-C', path, 'fetch', '--no-tags', self.object_cache.cache_dir,
+             f'+{self.object_cache.ref_name(path)}:{local_ref}'],
+            capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        )
+        if result.returncode != 0:
+            return result
+        
+        if BARE_CLONES:
+            run_git(path, 'symbolic-ref', 'HEAD', local_ref)
+            return result
+        run_git(path, 'symbolic-ref', 'refs/remotes/origin/HEAD', local_ref)
+        if sparse:
+            return self._sparse_checkout(path, branch)
+        return subprocess.run(
+            ['git', '-C', path, 'checkout', branch],
+            capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        )
+    
+    def _sparse_patterns(self):
+        return list(SPARSE_CHECKOUT_PATTERNS) + list(SPARSE_EXTRA_PATHS)
+    
+    def _sparse_checkout(self, path, branch=None):
+        """Check out only the sparse patterns, or everything when sparse-checkout is unavailable"""
+        result = subprocess.run(
+            ['git', '-C', path, 'sparse-checkout', 'set', '--no-cone'] + self._sparse_patterns(),
+            capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        )
+        if result.returncode != 0:
+            logger.warning(f"⚠️ Sparse checkout unavailable for {path} - checking out the full tree: {result.stderr.strip()}")
+        
+        return subprocess.run(
+            ['git', '-C', path, 'checkout'] + ([branch] if branch else []),
+            capture_output=True, text=True, timeout=CLONE_TIMEOUT
+        )
+    
+    def _update_sparse_patterns(self, path):
+        """Re-apply the configured patterns when they changed since the clone"""
+        if (run_git(path, 'config', '--bool', 'core.sparseCheckout') or '').strip() != 'true':
+            return
+        current = (run_git(path, 'sparse-checkout', 'list') or '').splitlines()
+        if current != self._sparse_patterns():
+            logger.info(f"🔧 Updating sparse checkout patterns for {path}")
+            run_git(path, 'sparse-checkout', 'set', '--no-cone', *self._sparse_patterns(), timeout=UPDATE_TIMEOUT)
+    
+    def probe_remote_head(self, path):
+        """Commit the remote's HEAD points at, or None when the remote can't be reached"""
+        output = run_git(path, 'ls-remote', 'origin', 'HEAD', timeout=REMOTE_PROBE_TIMEOUT)
+        return output.split()[0] if output and output.split() else None
+    
+    def probe_remote_heads(self, repo_paths, workers=REMOTE_PROBE_WORKERS):
+        """Probe many remotes at once; returns {repo_path: remote HEAD or None}"""
+        repo_paths = [path for path in repo_paths if os.path.exists(path)]
+        if not repo_paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            return dict(zip(repo_paths, pool.map(self.probe_remote_head, repo_paths)))
     
     def _update_repo(self, path):
         """Update an existing repository"""
+        previous_head = get_head(path)
+        self.repo_heads[path] = {'previous_head': previous_head, 'current_head': previous_head}
+        
+        remote_head = None
+        if SKIP_UNCHANGED_REMOTES:
+            remote_head = self.remote_heads.pop(path, None) or self.probe_remote_head(path)
+            self.repo_heads[path]['remote_head'] = remote_head
+            if remote_head and remote_head == previous_head:
+                # Nothing to fetch; the incremental scan then reuses every stored result
+                logger.info(f"⏭️ Remote HEAD unchanged for {path} - skipping update")
+                self.repo_heads[path]['decision'] = 'skipped'
+                return path, False
+        
+        if self.object_cache and self.object_cache.borrows(path):
+            # New objects land in the shared cache, so the update itself only moves refs
+            origin = (run_git(path, 'remote', 'get-url', 'origin') or '').strip()
+            if origin:
+                self.object_cache.fetch(origin, path, timeout=UPDATE_TIMEOUT, head=remote_head)
+        
+        if is_bare_repo(path):
+            # No working tree to merge into - move the checked-out branch to the remote HEAD
+            branch = (run_git(path, 'symbolic-ref', 'HEAD') or 'HEAD').strip()
+            command = ['git', '-C', path, 'fetch', '--depth', '1', 'origin', f'+HEAD:{branch}']
+        else:
+            self._update_sparse_patterns(path)
+            command = ['git', '-C', path, 'pull']
+        
         try:
             result = subprocess.run(
-                ['git', '-C', path, 'pull'],
-                capture_output=True, text=True, timeout=180
+                command,
+                capture_output=True, text=True, timeout=UPDATE_TIMEOUT
             )
             
             if result.returncode == 0:
-                logger.info(f"✅ Successfully updated: {path}")
-                return path
+                current_head = get_head(path)
+                self.repo_heads[path]['current_head'] = current_head
+                self.repo_heads[path]['decision'] = 'updated' if current_head != previous_head else 'up_to_date'
+                if current_head == previous_head:
+                    logger.info(f"✅ Already up to date: {path}")
+                else:
+                    logger.info(f"✅ Successfully updated: {path} ({str(previous_head)[:8]} -> {str(current_head)[:8]})")
+                return path, False
             else:
                 logger.warning(f"⚠️ Update failed for {path}: {result.stderr}")
-                return path  # Still return path even if update failed
+                self.repo_heads[path]['decision'] = 'update_failed'
+                return path, True  # Still return path even if update failed
                 
         except subprocess.TimeoutExpired:
             logger.warning(f"⏰ Update timeout for: {path}")
-            return path
+            self.repo_heads[path]['decision'] = 'update_failed'
+            return path, True
         except Exception as e:
             logger.error(f"❌ Error updating {path}: {e}")
-            return path
+            self.repo_heads[path]['decision'] = 'update_failed'
+            return path, True
+    
+    def batch_clone_protocols(self, protocols, workers=CLONE_WORKERS, per_host_limit=CLONE_PER_HOST_LIMIT,
+                              retries=CLONE_RETRIES, backoff=CLONE_RETRY_BACKOFF):
+        """Clone or update protocols in batch, concurrently when workers > 1"""
+        # The update log records this batch's decisions only
+        self.repo_heads = {}
+        targets = [self._repo_target(protocol) for protocol in protocols]
+        if SKIP_UNCHANGED_REMOTES:
+            # One concurrent round of cheap probes decides which updates can be skipped
+            self.remote_heads = self.probe_remote_heads({target[1] for target in targets if target})
+        
+        if workers <= 1:
+            cloned_protocols = self._serial_clone(protocols, targets)
+        else:
+            cloned_protocols = self._concurrent_clone(protocols, targets, workers, per_host_limit, retries, backoff)
+        
+        logger.info(f"✅ Successfully processed {len(cloned_protocols)}/{len(protocols)} protocols")
+        self.remote_heads = {}
+        self.update_log.save(self.repo_heads)
+        self._collect_object_cache()
+        return cloned_protocols
+    
+    def _concurrent_clone(self, protocols, targets, workers, per_host_limit, retries, backoff):
+        """(protocol, repo_path) for every protocol whose repository synced"""
+        # Protocols sharing a repository must not clone into the same directory at once
+        urls = {}
+        for target in targets:
+            if target:
+                urls.setdefault(target[1], target[0])
+        
+        synced = self._concurrent_sync(urls, workers, per_host_limit, retries, backoff)
+        
+        return [
+            (protocol, synced[target[1]]) for protocol, target in zip(protocols, targets)
+            if target and synced.get(target[1])
+        ]
     
-    def batch_clone_protocols(self, protocols):
-        """Clone multiple protocols in batch with rate limiting"""
+    def _serial_clone(self, protocols, targets):
+        """Clone multiple protocols one at a time with rate limiting"""
         cloned_protocols = []
         
-        for i, protocol in enumerate(protocols):
+        for i, (protocol, target) in enumerate(zip(protocols, targets)):
             logger.info(f"📦 Processing {i+1}/{len(protocols)}: {protocol.get('name')}")
             
-            repo_path = self.clone_or_update_repo(protocol)
+            repo_path = self._sync_repo(*target)[0] if target else None
             if repo_path:
                 cloned_protocols.append((protocol, repo_path))
             
-            # Respect rate limits - small delay between operations
-            if i < len(protocols) - 1:  # Don't delay after last item
+            # Respect rate limits - small delay between operations (skipped updates made no request)
+            skipped = target and self.repo_heads.get(target[1], {}).get('decision') == 'skipped'
+            if i < len(protocols) - 1 and not skipped:  # Don't delay after last item
                 time.sleep(1)
         
-        logger.info(f"✅ Successfully processed {len(cloned_protocols)}/{len(protocols)} protocols")
         return cloned_protocols
+    
+    def _concurrent_sync(self, targets, workers, per_host_limit, retries, backoff):
+        """Sync {repo_path: url} on a thread pool; returns {repo_path: path or None}"""
+        synced = {}
+        hosts = {repo_path: self._host(url) for repo_path, url in targets.items()}
+        active = Counter()
+        ready = deque((repo_path, 1) for repo_path in targets)
+        # Failed repos wait here for their backoff without holding a worker
+        delayed = []
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while ready or delayed or running:
+                now = time.monotonic()
+                while delayed and delayed[0][0] <= now:
+                    ready.append(heapq.heappop(delayed)[1:])
+                
+                # Start as much as the pool and each host allow; busy hosts wait their turn
+                for _ in range(len(ready)):
+                    if len(running) >= workers:
+                        break
+                    repo_path, attempt = ready.popleft()
+                    if per_host_limit and active[hosts[repo_path]] >= per_host_limit:
+                        ready.append((repo_path, attempt))
+                        continue
+                    active[hosts[repo_path]] += 1
+                    future = pool.submit(self._sync_repo, targets[repo_path], repo_path)
+                    running[future] = (repo_path, attempt)
+                
+                wait_time = max(0, delayed[0][0] - now) if delayed else None
+                if not running:
+                    time.sleep(wait_time)
+                    continue
+                
+                done, _ = wait(list(running), timeout=wait_time, return_when=FIRST_COMPLETED)
+                for future in done:
+                    repo_path, attempt = running.pop(future)
+                    active[hosts[repo_path]] -= 1
+                    try:
+                        path, failed = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error syncing {repo_path}: {e}")
+                        path, failed = None, True
+                    
+                    if failed and attempt <= retries:
+                        delay = backoff * 2 ** (attempt - 1)
+                        logger.warning(f"🔁 Retrying {os.path.basename(repo_path)} in {delay}s (attempt {attempt + 1}/{retries + 1})")
+                        heapq.heappush(delayed, (time.monotonic() + delay, repo_path, attempt + 1))
+                    else:
+                        # A failed update still leaves the previous checkout to scan
+                        synced[repo_path] = path
+        
+        return synced
+    
+    def _collect_object_cache(self):
+        """Garbage-collect the shared cache once per interval, while no clone is writing to it"""
+        if self.object_cache and self.object_cache.gc_due():
+            repo_paths = [os.path.join(self.base_dir, name) for name in os.listdir(self.base_dir)]
+            self.object_cache.gc(repo_paths)
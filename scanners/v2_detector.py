@@ -2,18 +2,110 @@
 Uniswap V2 Fork Detection Engine
 """
 
-import os
+import mmap
 import re
-from config.settings import V2_AMM_PATTERNS
+from config.settings import SCAN_WORKERS, SCAN_CHUNK_SIZE, SCAN_MODE
+from utils.repo_snapshot import load_source
+from utils.git_source import open_snapshot
+from utils.literal_prefilter import LiteralPrefilter
+from utils.parallel import parallel_map, resolve_workers
+from utils.finding_cache import default_finding_cache, ruleset_hash
+from utils.content_store import ContentStore
+from utils.solidity_lexer import code_view, CODE_VIEW_VERSION
+from utils.rule_packs import default_ruleset_loader
+
+# Per-process detector used by parallel scan workers
+_worker_detector = None
+
+def _init_worker(scan_mode, ruleset):
+    global _worker_detector
+    _worker_detector = V2Detector(workers=1, cache=None, scan_mode=scan_mode, ruleset=ruleset)
+
+def _analyze_in_worker(item):
+    file_path, content = item
+    return _worker_detector._analyze_file(file_path, content)
 
 class V2Detector:
-    def __init__(self):
-        self.patterns = V2_AMM_PATTERNS
+    def __init__(self, workers=SCAN_WORKERS, chunk_size=SCAN_CHUNK_SIZE, cache=default_finding_cache,
+                 scan_mode=SCAN_MODE, ruleset=None):
+        self.scan_mode = scan_mode
+        self.cache = cache() if callable(cache) else cache
+        self.workers = resolve_workers(workers)
+        self.chunk_size = chunk_size
+        # An explicit ruleset is fixed; otherwise follow the shared loader and its hot reloads
+        self.ruleset_loader = None if ruleset else default_ruleset_loader()
+        self._apply_ruleset(ruleset or self.ruleset_loader.ruleset)
+    
+    def _apply_ruleset(self, ruleset):
+        """Take interface and indicator literals from a ruleset and rekey cached results"""
+        self.ruleset = ruleset
+        v2_detection = ruleset['v2_detection']
+        self.patterns = {
+            'interfaces': v2_detection['interfaces'],
+            'vulnerabilities': v2_detection['indicators']
+        }
+        self.amm_types = v2_detection['amm_types']
+        # Only the V2 section is hashed, so edits to detection rules keep these results cached
+        self.ruleset_version = ruleset_hash([CODE_VIEW_VERSION, v2_detection])
+        # Identical blobs across all repos in this run are analyzed once
+        self.content_store = ContentStore('v2_detector', self.ruleset_version, self.cache)
+        self.prefilter = LiteralPrefilter(
+            self.patterns['interfaces'] + self.patterns['vulnerabilities']
+        )
     
-    def detect_v2_usage(self, repo_path):
+    def refresh_rules(self):
+        """Switch to edited rule packs between repository scans"""
+        if self.ruleset_loader is None:
+            return
+        self.ruleset_loader.reload_if_changed()
+        if self.ruleset_loader.ruleset['version'] != self.ruleset['version']:
+            self._apply_ruleset(self.ruleset_loader.ruleset)
+    
+    def detect_v2_usage(self, repo_path, snapshot=None):
         """Detect if repository uses any Uniswap V2 fork"""
         print(f"🔍 Scanning for V2 AMM usage in: {repo_path}")
         
+        if snapshot is None:
+            snapshot = open_snapshot(repo_path)
+        
+        return self.summarize(self.analyze_files(snapshot))
+    
+    def analyze_files(self, snapshot, known=None):
+        """Per-file V2 indicators in snapshot order, reusing `known` results for unchanged files"""
+        self.refresh_rules()
+        known = known or {}
+        pending = [file_path for file_path in snapshot.files if file_path not in known]
+        
+        file_indicators = dict(known)
+        file_indicators.update(self.content_store.resolve(snapshot, pending, self._analyze_blobs))
+        
+        # Unreadable files and files deleted since the known results are dropped
+        return {
+            file_path: file_indicators[file_path]
+            for file_path in snapshot.files
+            if file_path in file_indicators
+        }
+    
+    def _analyze_blobs(self, files_with_content):
+        """Analyze one file per unique blob and return indicators in order"""
+        if self.workers > 1 and len(files_with_content) > self.chunk_size:
+            # Memory maps can't be pickled - workers map those files themselves; git blobs are sent as-is
+            items = (
+                (file_path, None if isinstance(content, mmap.mmap) else content)
+                for file_path, content, _, _ in files_with_content
+            )
+            return parallel_map(
+                _analyze_in_worker, items, self.workers, self.chunk_size,
+                initializer=_init_worker, initargs=(self.scan_mode, self.ruleset)
+            )
+        
+        return (
+            self._analyze_file(file_path, content, code)
+            for file_path, content, code, _ in files_with_content
+        )
+    
+    def summarize(self, file_indicators):
+        """Aggregate per-file indicators into the repository-level V2 verdict"""
         v2_indicators = {
             'amm_type': None,
             'interfaces_found': [],
@@ -21,13 +113,10 @@ class V2Detector:
             'confidence_score': 0
         }
         
-        solidity_files = self._find_solidity_files(repo_path)
-        
-        for file_path in solidity_files:
-            file_indicators = self._analyze_file(file_path)
-            if file_indicators['is_v2_related']:
+        for file_path, indicators in file_indicators.items():
+            if indicators['is_v2_related']:
                 v2_indicators['v2_files'].append(file_path)
-                v2_indicators['interfaces_found'].extend(file_indicators['interfaces'])
+                v2_indicators['interfaces_found'].extend(indicators['interfaces'])
         
         # Determine AMM type and confidence
         v2_indicators['amm_type'] = self._determine_amm_type(v2_indicators['interfaces_found'])
@@ -35,18 +124,7 @@ class V2Detector:
         
         return v2_indicators
     
-    def _find_solidity_files(self, repo_path):
-        """Find all Solidity files in repository"""
-        solidity_files = []
-        
-        for root, dirs, files in os.walk(repo_path):
-            for file in files:
-                if file.endswith('.sol'):
-                    solidity_files.append(os.path.join(root, file))
-        
-        return solidity_files
-    
-    def _analyze_file(self, file_path):
+    def _analyze_file(self, file_path, content=None, code=None):
         """Analyze a single Solidity file for V2 indicators"""
         indicators = {
             'is_v2_related': False,
@@ -55,18 +133,24 @@ class V2Detector:
         }
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            if content is None:
+                content = load_source(file_path, self.scan_mode)
+            if code is None:
+                code = code_view(content)
+            
+            # Find every interface and pattern literal in one prefilter pass over the
+            # code view, so names in comments, strings and import paths don't count
+            found = self.prefilter.find(code)
             
             # Check for V2 interfaces
             for interface in self.patterns['interfaces']:
-                if interface in content:
+                if interface in found:
                     indicators['interfaces'].append(interface)
                     indicators['is_v2_related'] = True
             
             # Check for vulnerability patterns
             for pattern in self.patterns['vulnerabilities']:
-                if pattern in content:
+                if pattern in found:
                     indicators['vulnerability_patterns'].append(pattern)
             
         except Exception as e:
@@ -79,19 +163,9 @@ class V2Detector:
         if not interfaces_found:
             return "UNKNOWN"
         
-        interface_mapping = {
-            'IUniswapV2Pair': 'Uniswap V2',
-            'IPancakePair': 'PancakeSwap',
-            'IJoePair': 'Trader Joe',
-            'ISushiSwapPair': 'SushiSwap',
-            'IQuickSwapPair': 'QuickSwap',
-            'ISpookySwapPair': 'SpookySwap',
-            'IPangolinPair': 'Pangolin'
-        }
-        
         for interface in interfaces_found:
-            if interface in interface_mapping:
-                return interface_mapping[interface]
+            if self.amm_types.get(interface):
+                return self.amm_types[interface]
         
         return "Generic V2 Fork"
     
@@ -0,0 +1,66 @@
+"""
+Shared pytest fixtures
+"""
+
+import os
+import sys
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ORACLE_SOURCE = """pragma solidity ^0.8.0;
+
+interface IUniswapV2Pair {
+    function getReserves() external view returns (uint112, uint112, uint32);
+    function token0() external view returns (address);
+}
+
+contract Oracle {
+    IUniswapV2Pair public wethPair = IUniswapV2Pair(address(0));
+    
+    function price() external view returns (uint256) {
+        (uint112 reserve0, uint112 reserve1, ) = wethPair.getReserves();
+        return reserve0 / reserve1;
+    }
+}
+"""
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run each test from a scratch directory, since caches and logs use relative data/ and logs/ paths"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """Create a committed git repository from {relative path: source}"""
+    def make(name, files):
+        repo_path = os.path.join(str(tmp_path), name)
+        for rel_path, source in files.items():
+            file_path = os.path.join(repo_path, rel_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'w') as f:
+                f.write(source)
+        
+        git = ['git', '-C', repo_path, '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', repo_path], check=True)
+        subprocess.run(git + ['add', '-A'], check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], check=True)
+        return repo_path
+    return make
+
+@pytest.fixture
+def oracle_source():
+    return ORACLE_SOURCE
+
+@pytest.fixture
+def make_oracle_repo(make_repo):
+    """Create a repository with one V2 price oracle that divides raw reserves"""
+    def make(name='oracle'):
+        return make_repo(name, {'contracts/Oracle.sol': ORACLE_SOURCE})
+    return make
+
+@pytest.fixture
+def oracle_repo(make_oracle_repo):
+    return make_oracle_repo()
@@ -0,0 +1,136 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scanners.protocol_discoverer import ProtocolDiscoverer
+from utils import api_client, async_api_client
+from utils.api_client import SmartAPIClient
+from utils.async_api_client import AsyncAPIClient, HTTPStatusError
+from utils.rate_limiter import HostRateLimiter
+
+FAST_LIMITS = {'127.0.0.1': {'capacity': 100, 'per_second': 100}}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves protocol_details JSON; scripted paths answer their queued responses first"""
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            script = server.scripts.get(self.path)
+            status, headers, body = script.pop(0) if script else (200, {}, None)
+        
+        time.sleep(server.delay)
+        if body is None:
+            slug = self.path.rsplit('/', 1)[-1]
+            body = json.dumps({'github': [slug], 'forkedFrom': ['Uniswap V2'], 'tvl': [1, 2, 3]}).encode()
+        
+        self.send_response(status)
+        for name, value in {
+            'Content-Type': 'application/json', 'Content-Length': str(len(body)),
+            'X-RateLimit-Limit': '1000', 'X-RateLimit-Remaining': '900', 'X-RateLimit-Reset': str(int(time.time()) + 60),
+            **headers
+        }.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.in_flight -= 1
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.scripts = {}
+    server.in_flight = server.max_in_flight = 0
+    server.delay = 0
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(params=['aiohttp', 'threads'])
+def transport(request, monkeypatch):
+    """Run each test over aiohttp and over the thread-pool fallback"""
+    if request.param == 'aiohttp':
+        monkeypatch.setattr(async_api_client, 'aiohttp', pytest.importorskip('aiohttp'))
+    else:
+        monkeypatch.setattr(async_api_client, 'aiohttp', None)
+    return request.param
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(api_client, 'RETRY_DELAY', 0)
+    monkeypatch.setattr(async_api_client, 'RETRY_DELAY', 0)
+
+def test_enrich_protocols_concurrently_through_the_shared_limiter(stub_server, transport):
+    stub_server.delay = 0.2
+    discoverer = ProtocolDiscoverer()
+    discoverer.api.rate_limiter = HostRateLimiter(host_limits=FAST_LIMITS)
+    protocols = [{'name': f'Fork {i}', 'slug': f'fork-{i}'} for i in range(12)] + [{'name': 'No slug'}]
+    
+    started = time.monotonic()
+    discoverer.enrich_protocols(protocols, endpoint=stub_server.url + '/protocol/{}')
+    
+    # Twelve 0.2s responses would take 2.4s one at a time
+    assert time.monotonic() - started < 1.5
+    assert 1 < stub_server.max_in_flight
+    assert sorted(stub_server.requests) == sorted(f'/protocol/fork-{i}' for i in range(12))
+    for i, protocol in enumerate(protocols[:12]):
+        # Only the configured fields survive; the TVL history is dropped on arrival
+        assert protocol['details'] == {'github': [f'fork-{i}'], 'forkedFrom': ['Uniswap V2']}
+    assert 'details' not in protocols[12]
+    
+    # The async responses' rate-limit headers landed in the bucket SmartAPIClient uses
+    bucket = discoverer.api.rate_limiter.bucket(stub_server.url)
+    assert bucket.capacity == 1000
+    assert bucket.reset_at is not None
+
+RETRY_SCRIPTS = {
+    # Rate limited with headers, then without them (message only), then recovered
+    '/limited': [(429, {'Retry-After': '0'}, b'{}'), (403, {}, b'{"message": "API rate limit exceeded"}'),
+                 (200, {}, b'{"ok": true}')],
+    # Server and client errors are both retried after RETRY_DELAY
+    '/flaky': [(500, {}, b'{}'), (404, {}, b'{}'), (200, {}, b'{"ok": true}')],
+    '/down': [(503, {}, b'{}')] * 3,
+}
+
+def run_smart(stub_server, path, retries):
+    client = SmartAPIClient(rate_limiter=HostRateLimiter(host_limits=FAST_LIMITS))
+    client.rate_limiter.bucket(stub_server.url).fallback_backoff = 0
+    return client.get(stub_server.url + path, retries=retries).json()
+
+def run_async(stub_server, path, retries):
+    client = AsyncAPIClient(rate_limiter=HostRateLimiter(host_limits=FAST_LIMITS))
+    client.rate_limiter.bucket(stub_server.url).fallback_backoff = 0
+    
+    async def fetch():
+        async with client:
+            return await client.get_json(stub_server.url + path, retries=retries)
+    return asyncio.run(fetch())
+
+@pytest.mark.parametrize('path,retries', [('/limited', 3), ('/flaky', 3), ('/down', 2)])
+def test_retry_policy_matches_smart_api_client(stub_server, transport, path, retries):
+    outcomes = []
+    for run in (run_smart, run_async):
+        stub_server.scripts = {key: list(script) for key, script in RETRY_SCRIPTS.items()}
+        stub_server.requests = []
+        try:
+            outcomes.append((run(stub_server, path, retries), len(stub_server.requests)))
+        except (HTTPStatusError, api_client.requests.exceptions.HTTPError):
+            outcomes.append(('failed', len(stub_server.requests)))
+    
+    assert outcomes[0] == outcomes[1]
+    assert outcomes[0] == (('failed', 3) if path == '/down' else ({'ok': True}, 3))
@@ -0,0 +1,20 @@
+from detectors.universal_v2_scanner import UniversalV2Scanner
+from utils.block_index import BLOCK_INDEXES
+
+def test_block_index_built_once_per_blob(oracle_repo, monkeypatch):
+    built = []
+    build = BLOCK_INDEXES.build
+    
+    def counting_build(code):
+        built.append(code)
+        return build(code)
+    
+    monkeypatch.setattr(BLOCK_INDEXES, 'build', counting_build)
+    BLOCK_INDEXES.clear()
+    
+    # Scoped rules and price taint symbol extraction both need the oracle's blocks
+    result = UniversalV2Scanner(incremental=False, price_taint=True).scan_protocol({'name': 'oracle'}, oracle_repo)
+    
+    assert result['vulnerabilities']
+    assert result['price_taint'] is not None
+    assert len(built) == 1
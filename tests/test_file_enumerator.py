@@ -0,0 +1,36 @@
+import os
+import pytest
+from detectors.universal_v2_scanner import UniversalV2Scanner
+from utils.file_enumerator import FileEnumerator
+from utils.git_source import GitTreeSnapshot
+from utils.repo_snapshot import RepoSnapshot
+
+@pytest.fixture
+def flattened_repo(make_repo, oracle_source):
+    return make_repo('flattened', {
+        'contracts/Oracle.sol': oracle_source,
+        'flat/Oracle_flat.sol': oracle_source,
+        'contracts/Bundle.sol': oracle_source + '// padding\n' * 200
+    })
+
+def test_flattened_and_large_files_are_scanned_by_default(flattened_repo):
+    files = RepoSnapshot(flattened_repo).files
+    
+    assert [os.path.relpath(path, flattened_repo) for path in files] == [
+        'contracts/Bundle.sol', 'contracts/Oracle.sol', 'flat/Oracle_flat.sol'
+    ]
+
+@pytest.mark.parametrize('snapshot_class', [RepoSnapshot, GitTreeSnapshot])
+def test_opted_in_skips_are_reported_in_scan_results(flattened_repo, snapshot_class):
+    enumerator = FileEnumerator(generated_globs=['*_flat.sol'], max_file_kb=2)
+    snapshot = snapshot_class(flattened_repo, enumerator=enumerator)
+    
+    result = UniversalV2Scanner(incremental=False, price_taint=False).scan_protocol(
+        {'name': 'flattened'}, flattened_repo, snapshot
+    )
+    
+    assert {v['file'] for v in result['vulnerabilities']} == {os.path.join(flattened_repo, 'contracts/Oracle.sol')}
+    assert [(os.path.relpath(s['file'], flattened_repo), s['reason']) for s in result['skipped_files']] == [
+        ('contracts/Bundle.sol', 'too large'), ('flat/Oracle_flat.sol', 'generated')
+    ]
+    assert result['scan_summary']['skipped_files'] == 2
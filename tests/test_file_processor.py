@@ -0,0 +1,29 @@
+import os
+from utils.file_processor import FileProcessor
+
+def write(path, size=10):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('x' * size)
+
+def test_find_files_by_extension_lists_everything(tmp_path):
+    root = str(tmp_path / 'tree')
+    write(os.path.join(root, 'a.json'))
+    write(os.path.join(root, 'node_modules', 'dep.json'))
+    write(os.path.join(root, 'ignored', 'b.json'))
+    write(os.path.join(root, 'big.json'), 2 * 1024 * 1024)
+    with open(os.path.join(root, '.gitignore'), 'w') as f:
+        f.write('ignored/\n')
+    
+    found = FileProcessor().find_files_by_extension(root, '.json')
+    
+    assert sorted(os.path.relpath(path, root) for path in found) == [
+        'a.json', 'big.json', os.path.join('ignored', 'b.json'), os.path.join('node_modules', 'dep.json')
+    ]
+
+def test_count_solidity_files_applies_source_filters(tmp_path):
+    root = str(tmp_path / 'repo')
+    write(os.path.join(root, 'contracts', 'Pair.sol'))
+    write(os.path.join(root, 'node_modules', 'lib', 'Dep.sol'))
+    
+    assert FileProcessor().count_solidity_files(root) == 1
@@ -0,0 +1,48 @@
+import subprocess
+import pytest
+from detectors.universal_v2_scanner import UniversalV2Scanner
+from utils.git_source import open_snapshot, GitTreeSnapshot
+from main import FocusedVulnerabilityAnalyzer
+
+def test_fresh_tree_snapshot_reads_before_listing(oracle_repo):
+    snapshot = GitTreeSnapshot(oracle_repo, mode='text')
+    file_path = f"{oracle_repo}/contracts/Oracle.sol"
+    
+    assert snapshot.content_hash(file_path) is not None
+    assert 'getReserves' in snapshot.read(file_path)
+    assert snapshot.code_view(file_path) is not None
+    snapshot.release()
+
+def test_git_tree_finding_shows_real_pools(oracle_repo):
+    scanner = UniversalV2Scanner(incremental=False, price_taint=False)
+    result = scanner.scan_protocol({'name': 'oracle'}, oracle_repo, snapshot=open_snapshot(oracle_repo, source='git'))
+    assert result['vulnerabilities']
+    
+    # The display opens its own snapshot, which nothing has listed yet
+    snapshot = open_snapshot(oracle_repo, mode='text', source='git')
+    analysis = FocusedVulnerabilityAnalyzer().analyze_vulnerability(result['vulnerabilities'][0], snapshot=snapshot)
+    snapshot.release()
+    
+    assert 'wethPair' in analysis['affected_pools']
+    assert 'Primary AMM Pool' not in analysis['affected_pools']
+
+@pytest.mark.parametrize('mode', ['text', 'bytes'])
+def test_worktree_and_git_snapshots_share_content_hashes(make_repo, oracle_source, mode):
+    repo = make_repo('mixed', {'contracts/Oracle.sol': oracle_source})
+    # Invalid UTF-8 and CRLF line endings must not make the two sources disagree either
+    with open(f"{repo}/contracts/Raw.sol", 'wb') as f:
+        f.write(b'contract Raw {}\r\n// \xff\xfe\r\n')
+    subprocess.run(['git', '-C', repo, 'add', '-A'], check=True)
+    subprocess.run(['git', '-C', repo, '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+                    'commit', '-qm', 'raw'], check=True)
+    
+    worktree = open_snapshot(repo, mode=mode, source='worktree')
+    tree = open_snapshot(repo, mode=mode, source='git')
+    
+    assert worktree.files == tree.files
+    for file_path in worktree.files:
+        assert worktree.content_hash(file_path) == tree.content_hash(file_path)
+        content = worktree.read(file_path)
+        assert (content if mode == 'text' else bytes(content)) == tree.read(file_path)
+    worktree.release()
+    tree.release()
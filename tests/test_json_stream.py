@@ -0,0 +1,35 @@
+import json
+import pytest
+from utils.json_stream import iter_json_array
+
+def split_everywhere(raw):
+    """Every way of cutting raw into two chunks"""
+    for cut in range(len(raw) + 1):
+        yield [raw[:cut], raw[cut:]]
+
+def test_objects_split_at_every_boundary():
+    data = [{'name': 'Pair', 'tvl': 1.5, 'tags': ['a,]b', None, True]}, {}, []]
+    raw = json.dumps(data).encode()
+    for chunks in split_everywhere(raw):
+        assert list(iter_json_array(chunks)) == data
+
+def test_multibyte_characters_split_at_every_boundary():
+    data = ['Prötocol ✓', {'name': '池'}]
+    raw = json.dumps(data, ensure_ascii=False).encode()
+    for chunks in split_everywhere(raw):
+        assert list(iter_json_array(chunks)) == data
+
+@pytest.mark.parametrize('text', ['[1.5]', '[1e3, 2E-2]', '[-12.25e+1 , 7]', '[123456789, 0.0]', '[true, 1, false]'])
+def test_numbers_split_at_every_boundary(text):
+    raw = text.encode()
+    for chunks in split_everywhere(raw):
+        assert list(iter_json_array(chunks)) == json.loads(text)
+
+def test_number_cut_after_decimal_point():
+    assert list(iter_json_array([b'[1.', b'5]'])) == [1.5]
+    assert list(iter_json_array([b'[2e', b'2]'])) == [200.0]
+
+@pytest.mark.parametrize('raw', [b'{"a": 1}', b'[1, 2', b'[1 2]', b'[{"a":'])
+def test_malformed_input_raises(raw):
+    with pytest.raises(ValueError):
+        list(iter_json_array([raw]))
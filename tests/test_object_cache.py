@@ -0,0 +1,21 @@
+import os
+from scanners.object_cache import SharedObjectCache
+from utils.git_utils import get_head, run_git
+
+def test_fork_at_a_cached_commit_needs_no_fetch(oracle_repo, tmp_path):
+    cache = SharedObjectCache(str(tmp_path / 'cache.git'))
+    head = get_head(oracle_repo)
+    
+    assert cache.fetch(f'file://{oracle_repo}', 'upstream', head=head).returncode == 0
+    # The remote is unreachable, so this only succeeds without touching the network
+    result = cache.fetch('file:///nonexistent/fork.git', 'fork', head=head)
+    
+    assert result.returncode == 0
+    assert run_git(cache.cache_dir, 'rev-parse', cache.ref_name('fork')).strip() == head
+
+def test_fork_at_a_new_commit_is_fetched(oracle_repo, tmp_path):
+    cache = SharedObjectCache(str(tmp_path / 'cache.git'))
+    
+    assert cache.fetch('file:///nonexistent/fork.git', 'fork', head=get_head(oracle_repo)).returncode != 0
+    assert cache.fetch(f'file://{oracle_repo}', 'fork', head=get_head(oracle_repo)).returncode == 0
+    assert os.path.exists(os.path.join(cache.cache_dir, 'shallow'))
@@ -0,0 +1,16 @@
+from utils.parallel import parallel_map, CHUNKS_IN_FLIGHT_PER_WORKER
+
+def test_parallel_map_reads_items_through_a_bounded_window():
+    consumed = []
+    
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield -i
+    results = parallel_map(abs, items(), workers=2, chunk_size=3)
+    
+    assert next(results) == 0
+    # Only the first window of chunks (plus its refill) was read before the first result came back
+    assert len(consumed) <= (2 * CHUNKS_IN_FLIGHT_PER_WORKER + 1) * 3
+    assert [0] + list(results) == list(range(100))
+    assert len(consumed) == 100
@@ -0,0 +1,68 @@
+import pytest
+from config.settings import SCAN_CHUNK_SIZE
+from detectors.pattern_matcher import PatternMatcher
+from detectors.universal_v2_scanner import UniversalV2Scanner
+from scanners.v2_detector import V2Detector
+from utils.git_source import open_snapshot
+
+CHUNK_SIZE = 2
+
+# One-line spot read; appended to some files so findings differ in count and severity per file
+SPOT_CONTRACT = """
+contract Spot%d { function spot() external view returns (uint256 r) { (r, , ) = pair().getReserves(); } }
+"""
+
+@pytest.fixture
+def fork_repo(make_repo, oracle_source):
+    """More distinct sources than SCAN_CHUNK_SIZE, so every worker gets several chunks"""
+    files = {}
+    for i in range(SCAN_CHUNK_SIZE + 3):
+        source = oracle_source.replace('contract Oracle', f'contract Oracle{i}')
+        if i % 3 == 0:
+            source += SPOT_CONTRACT % i
+        files[f'contracts/pools/Oracle{i}.sol'] = source
+    return make_repo('fork', files)
+
+MODES = pytest.mark.parametrize('mode,source', [
+    ('text', 'worktree'), ('bytes', 'worktree'), ('text', 'git'), ('bytes', 'git')
+])
+
+def scan_files(repo, mode, source, workers):
+    snapshot = open_snapshot(repo, mode=mode, source=source)
+    try:
+        matcher = PatternMatcher(workers=workers, chunk_size=CHUNK_SIZE, cache=None, scan_mode=mode)
+        detector = V2Detector(workers=workers, chunk_size=CHUNK_SIZE, cache=None, scan_mode=mode)
+        return list(matcher.scan_files(snapshot).items()), list(detector.analyze_files(snapshot).items())
+    finally:
+        snapshot.release()
+
+@MODES
+def test_parallel_detectors_match_serial(fork_repo, mode, source):
+    serial_findings, serial_indicators = scan_files(fork_repo, mode, source, workers=1)
+    parallel_findings, parallel_indicators = scan_files(fork_repo, mode, source, workers=2)
+    
+    assert len(serial_findings) == SCAN_CHUNK_SIZE + 3
+    assert any(findings for _, findings in serial_findings)
+    # Same files, same findings, same order
+    assert parallel_findings == serial_findings
+    assert parallel_indicators == serial_indicators
+
+def scan_protocol(repo, mode, source, workers):
+    scanner = UniversalV2Scanner(incremental=False, price_taint=False)
+    scanner.v2_detector = V2Detector(workers=workers, chunk_size=CHUNK_SIZE, cache=None, scan_mode=mode)
+    scanner.pattern_matcher = PatternMatcher(workers=workers, chunk_size=CHUNK_SIZE, cache=None, scan_mode=mode)
+    snapshot = open_snapshot(repo, mode=mode, source=source)
+    try:
+        return scanner.scan_protocol({'name': 'fork'}, repo, snapshot)
+    finally:
+        snapshot.release()
+
+@MODES
+def test_parallel_protocol_scan_matches_serial(fork_repo, mode, source):
+    serial = scan_protocol(fork_repo, mode, source, workers=1)
+    parallel = scan_protocol(fork_repo, mode, source, workers=2)
+    
+    assert 'error' not in serial
+    assert serial['vulnerabilities']
+    for key in ('v2_detection', 'vulnerabilities', 'top_findings', 'risk_assessment'):
+        assert parallel[key] == serial[key]
@@ -0,0 +1,25 @@
+import threading
+import pytest
+from utils.regex_engine import RegexEngine, RegexTimeout
+
+def test_budget_interrupts_backtracking_in_main_thread():
+    engine = RegexEngine('re', rule_budget=0.2)
+    rule = engine.compile(r'(a+)+$')
+    
+    with pytest.raises(RegexTimeout):
+        engine.find_all(rule, 'a' * 40 + 'b')
+
+def test_unenforceable_budget_warns_once(capsys):
+    engine = RegexEngine('re', rule_budget=5)
+    rule = engine.compile(r'getReserves')
+    results = []
+    
+    def scan():
+        results.append(engine.find_all(rule, 'getReserves(); getReserves();'))
+        results.append(engine.find_all(rule, 'getReserves();'))
+    thread = threading.Thread(target=scan)
+    thread.start()
+    thread.join()
+    
+    assert [len(matches) for matches in results] == [2, 1]
+    assert capsys.readouterr().out.count("can't interrupt a match") == 1
@@ -0,0 +1,21 @@
+from utils.solidity_lexer import LexedCache
+
+def test_lexed_cache_is_bounded_by_bytes():
+    builds = []
+    
+    def build(content):
+        builds.append(content)
+        return content.upper()
+    cache = LexedCache(build, max_entries=100, max_bytes=25)
+    
+    for i in range(3):
+        cache.get(f'hash{i}', f'{i}' * 10)
+    # The third 10-byte view pushed the first out
+    assert cache.total_bytes == 20
+    cache.get('hash2', '2' * 10)
+    cache.get('hash0', '0' * 10)
+    assert builds == ['0' * 10, '1' * 10, '2' * 10, '0' * 10]
+    
+    # A view over the cap is returned but never kept
+    assert cache.get('huge', 'x' * 30) == 'X' * 30
+    assert cache.total_bytes == 20
@@ -0,0 +1,38 @@
+import os
+from config.settings import PROTOCOLS_DIR
+from detectors.universal_v2_scanner import UniversalV2Scanner
+
+def test_concurrent_scan_keeps_scanner_options(make_oracle_repo):
+    repos = [make_oracle_repo(name) for name in ('first', 'second')]
+    scanner = UniversalV2Scanner(incremental=False, price_taint=False)
+    
+    results = list(scanner.iter_scan_protocols([({'name': os.path.basename(repo)}, repo) for repo in repos], workers=2))
+    
+    assert len(results) == 2
+    for result in results:
+        assert 'error' not in result
+        assert result['vulnerabilities']
+        assert result['price_taint'] is None
+    # incremental=False must not read or write stored scan state in the children either
+    assert not os.path.exists(os.path.join(PROTOCOLS_DIR, 'scan_state'))
+
+SPOT_SOURCE = """pragma solidity ^0.8.0;
+
+import "./Oracle.sol";
+
+contract Spot {
+    IUniswapV2Pair pair;
+    
+    function spot() external view returns (uint256 r) { (r, , ) = pair.getReserves(); }
+}
+"""
+
+def test_top_findings_ranked_while_streaming(make_repo, oracle_source):
+    # The CRITICAL finding is in the later file, after the HIGH one
+    repo = make_repo('spot', {'contracts/Oracle.sol': oracle_source, 'contracts/Spot.sol': SPOT_SOURCE})
+    result = UniversalV2Scanner(incremental=False, price_taint=False, top_k=1).scan_protocol({'name': 'oracle'}, repo)
+    
+    assert len(result['vulnerabilities']) > 1
+    # Same as the head of the full severity-sorted list, without ranking that list afterwards
+    assert result['top_findings'] == result['vulnerabilities'][:1]
+    assert result['top_findings'][0]['severity'] == 'CRITICAL'
@@ -5,76 +5,162 @@ Smart API Client with Rate Limiting
 import requests
 import time
 import json
+from urllib.parse import urlparse
 from utils.logger import setup_logger
-from config.api_config import get_github_token, should_pause, get_delay
+from config.api_config import (
+    GITHUB_CONFIG, get_github_token, REQUEST_TIMEOUT, REQUEST_RETRIES, RETRY_DELAY, STREAM_CHUNK_SIZE
+)
+from utils.rate_limiter import HostRateLimiter
+from utils.http_cache import default_http_cache, cache_variant
 
 logger = setup_logger(__name__)
 
 class SmartAPIClient:
-    def __init__(self):
+    def __init__(self, rate_limiter=None, http_cache=None):
         self.requests_made = 0
         self.session = requests.Session()
+        # Separate buckets per host, refilled from each response's rate-limit headers
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        # Repeat requests go out conditionally; GitHub doesn't count 304s against the quota
+        self.http_cache = http_cache if http_cache is not None else default_http_cache()
         self.github_token = get_github_token()
         
-        # Set default headers
+        # GitHub headers, sent only to the GitHub API so other hosts never see the token
+        self.github_headers = {}
         if self.github_token:
-            self.session.headers.update({
+            self.github_headers = {
                 'Authorization': f'token {self.github_token}',
                 'Accept': 'application/vnd.github.v3+json'
-            })
+            }
     
-    def get(self, url, params=None, headers=None, retries=3):
-        """Smart GET request with rate limiting"""
-        if should_pause(self.requests_made):
-            logger.warning("⏸️ Approaching rate limit - pausing for 1 hour")
-            time.sleep(3600)
-            self.requests_made = 0
+    def _request_headers(self, url, headers):
+        if urlparse(url).hostname == urlparse(GITHUB_CONFIG['base_url']).hostname:
+            return {**self.github_headers, **(headers or {})}
+        return dict(headers or {})
+    
+    def get(self, url, params=None, headers=None, retries=REQUEST_RETRIES, stream=False):
+        """Smart GET request with rate limiting, answered from the HTTP cache while fresh"""
+        if params:
+            # The cache keys on the full URL
+            url = requests.Request('GET', url, params=params).prepare().url
+        headers = self._request_headers(url, headers)
+        
+        entry = None
+        if self.http_cache is not None:
+            variant = cache_variant({**self.session.headers, **headers})
+            entry = self.http_cache.lookup(url, variant)
+            if entry and entry['fresh']:
+                cached = self._cached_response(entry, stream)
+                if cached is not None:
+                    return cached
         
-        # Respect rate limits
-        time.sleep(get_delay())
+        # Waits only as long as the host's remaining quota requires
+        self.rate_limiter.acquire(url)
         
         try:
-            response = self.session.get(url, params=params, headers=headers, timeout=30)
+            request_headers = {**headers, **self.http_cache.conditional_headers(entry)} if entry else headers
+            response = self.session.get(url, headers=request_headers, timeout=REQUEST_TIMEOUT, stream=stream)
             self.requests_made += 1
             
-            if response.status_code == 403 and 'rate limit' in response.text.lower():
-                logger.warning("⚠️ Rate limit hit, implementing backoff...")
-                time.sleep(60)  # 1 minute backoff
-                return self.get(url, params, headers, retries - 1)
+            if self._rate_limited(url, response) and retries > 0:
+                logger.warning("⚠️ Rate limit hit, waiting for the quota to reset...")
+                response.close()
+                return self.get(url, None, headers, retries - 1, stream)
+            
+            if response.status_code == 304 and entry:
+                cached = self._cached_response(self.http_cache.revalidate(entry, response.headers), stream)
+                if cached is not None:
+                    return cached
+                # Evicted since the lookup - the next attempt goes out unconditionally
+                return self.get(url, None, headers, retries, stream)
             
             response.raise_for_status()
+            response.from_cache = False
+            if self.http_cache is not None and response.status_code == 200:
+                if stream:
+                    # Body not read yet; stream() saves it on the way through
+                    response.cache_key = (url, variant)
+                else:
+                    self.http_cache.store(url, response.headers, response.content, variant)
             return response
             
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ API request failed: {e}")
             if retries > 0:
                 logger.info(f"🔄 Retrying... ({retries} attempts left)")
-                time.sleep(5)
-                return self.get(url, params, headers, retries - 1)
+                time.sleep(RETRY_DELAY)
+                return self.get(url, None, headers, retries - 1, stream)
             raise
     
-    def post(self, url, data=None, json_data=None, headers=None, retries=3):
-        """Smart POST request with rate limiting"""
-        if should_pause(self.requests_made):
-            logger.warning("⏸️ Approaching rate limit - pausing for 1 hour")
-            time.sleep(3600)
-            self.requests_made = 0
+    def stream(self, url, params=None, headers=None, chunk_size=STREAM_CHUNK_SIZE):
+        """GET yielding the body in chunks, read from the cache or saved to it while downloading"""
+        response = self.get(url, params, headers, stream=True)
+        chunks = response.iter_content(chunk_size)
+        cache_key = getattr(response, 'cache_key', None)
+        if cache_key is not None:
+            chunks = self.http_cache.write_through(cache_key[0], response.headers, chunks, cache_key[1])
         
-        time.sleep(get_delay())
+        try:
+            yield from chunks
+        finally:
+            response.close()
+            if response.from_cache:
+                # Response.close() leaves a fully read body file open
+                response.raw.close()
+    
+    def post(self, url, data=None, json_data=None, headers=None, retries=REQUEST_RETRIES):
+        """Smart POST request with rate limiting"""
+        self.rate_limiter.acquire(url)
         
         try:
-            response = self.session.post(url, data=data, json=json_data, headers=headers, timeout=30)
+            response = self.session.post(url, data=data, json=json_data, headers=self._request_headers(url, headers),
+                                         timeout=REQUEST_TIMEOUT)
             self.requests_made += 1
+            
+            if self._rate_limited(url, response) and retries > 0:
+                logger.warning("⚠️ Rate limit hit, waiting for the quota to reset...")
+                return self.post(url, data, json_data, headers, retries - 1)
+            
             response.raise_for_status()
             return response
             
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ API POST failed: {e}")
             if retries > 0:
-                time.sleep(5)
+                time.sleep(RETRY_DELAY)
                 return self.post(url, data, json_data, headers, retries - 1)
             raise
     
+    def _cached_response(self, entry, stream=False):
+        """Response rebuilt from a cache entry, or None when its body has gone"""
+        response = requests.Response()
+        if stream:
+            try:
+                response.raw = open(self.http_cache.body_path(entry), 'rb')
+            except OSError:
+                return None
+        else:
+            response._content = self.http_cache.read(entry)
+            if response._content is None:
+                return None
+        
+        response.from_cache = True
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers.update(entry['headers'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+    
+    def _rate_limited(self, url, response):
+        """Update the host's bucket from the response; True when the request must be retried later"""
+        limited = self.rate_limiter.observe(url, response.status_code, response.headers)
+        if not limited and response.status_code == 403 and 'rate limit' in response.text.lower():
+            # Rate-limit message without headers saying for how long
+            self.rate_limiter.back_off(url)
+            limited = True
+        return limited
+    
     def get_github_rate_limit(self):
         """Check GitHub API rate limits"""
         if not self.github_token:
@@ -0,0 +1,209 @@
+"""
+Asyncio API Client over Pooled Keep-alive Connections
+"""
+
+import gzip
+import json
+import asyncio
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from config.api_config import (
+    REQUEST_TIMEOUT, REQUEST_RETRIES, RETRY_DELAY, ASYNC_FETCH_CONCURRENCY, HTTP_POOL_SIZE
+)
+from utils.rate_limiter import HostRateLimiter
+from utils.http_cache import default_http_cache, cache_variant
+from utils.logger import setup_logger
+
+try:
+    import aiohttp  # Optional: native asyncio transport
+except ImportError:
+    aiohttp = None
+
+logger = setup_logger(__name__)
+
+class HTTPStatusError(Exception):
+    """Raised when a request ends with an error status"""
+
+class ConnectionPool:
+    """Idle keep-alive http.client connections per origin, shared by the executor threads"""
+    
+    def __init__(self, size=HTTP_POOL_SIZE, timeout=REQUEST_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+    
+    def _connect(self, scheme, host, port):
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout)
+    
+    def get(self, url, headers):
+        """Blocking GET returning (status, headers, body), reusing an idle connection when one is free"""
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        
+        with self.lock:
+            idle = self.idle.get(origin)
+            connection = idle.pop() if idle else None
+        
+        reused = connection is not None
+        while True:
+            if connection is None:
+                connection = self._connect(*origin)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                # The server may have dropped a connection while it sat idle - retry once on a fresh one
+                if not reused:
+                    raise
+                connection, reused = None, False
+        
+        if response.will_close:
+            connection.close()
+        else:
+            with self.lock:
+                idle = self.idle.setdefault(origin, [])
+                if len(idle) < self.size:
+                    idle.append(connection)
+                    connection = None
+            if connection is not None:
+                connection.close()
+        
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return response.status, response.headers, body
+    
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+class AsyncAPIClient:
+    """Bounded-concurrency JSON fetches sharing SmartAPIClient's per-host rate limits and retry policy"""
+    
+    def __init__(self, rate_limiter=None, concurrency=ASYNC_FETCH_CONCURRENCY, pool_size=HTTP_POOL_SIZE,
+                 timeout=REQUEST_TIMEOUT, headers=None, http_cache=None):
+        # Pass SmartAPIClient's rate_limiter to share its buckets
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.http_cache = http_cache if http_cache is not None else default_http_cache()
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip', **(headers or {})}
+        self._session = None
+        self._pool = None
+        self._executor = None
+    
+    async def __aenter__(self):
+        if aiohttp:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers
+            )
+        else:
+            # Blocking requests run on threads; up to pool_size idle connections per host stay open for reuse
+            self._pool = ConnectionPool(self.pool_size, self.timeout)
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._pool.close()
+            self._executor = self._pool = None
+        return False
+    
+    async def _get(self, url, headers):
+        if self._session is not None:
+            async with self._session.get(url, headers=headers) as response:
+                return response.status, response.headers, await response.read()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._pool.get, url, {**self.headers, **headers})
+    
+    def _transport_errors(self):
+        errors = (OSError, http.client.HTTPException, asyncio.TimeoutError)
+        return errors + (aiohttp.ClientError,) if aiohttp else errors
+    
+    async def get_json(self, url, retries=REQUEST_RETRIES):
+        """GET and decode JSON, waiting on the host's bucket and retrying like SmartAPIClient.get"""
+        entry = None
+        if self.http_cache is not None:
+            variant = cache_variant(self.headers)
+            entry = self.http_cache.lookup(url, variant)
+            if entry and entry['fresh']:
+                body = self.http_cache.read(entry)
+                if body is not None:
+                    return json.loads(body)
+        
+        # Same policy as SmartAPIClient.get: rate-limited responses retry once the quota allows, any other
+        # error status or transport failure retries after RETRY_DELAY, and a 304 for an evicted body
+        # repeats the request unconditionally without using up an attempt
+        attempt = 0
+        while True:
+            delay = self.rate_limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            try:
+                status, headers, body = await self._get(url, self.http_cache.conditional_headers(entry) if entry else {})
+            except self._transport_errors() as e:
+                error = e
+            else:
+                limited = self.rate_limiter.observe(url, status, headers)
+                if not limited and status == 403 and b'rate limit' in body.lower():
+                    self.rate_limiter.back_off(url)
+                    limited = True
+                if limited and attempt < retries:
+                    # The next reserve() waits exactly until the quota allows
+                    logger.warning("⚠️ Rate limit hit, waiting for the quota to reset...")
+                    attempt += 1
+                    continue
+                if status == 304 and entry:
+                    body = self.http_cache.read(self.http_cache.revalidate(entry, headers))
+                    if body is not None:
+                        return json.loads(body)
+                    entry = None
+                    continue
+                if status < 400:
+                    data = json.loads(body)
+                    if self.http_cache is not None and status == 200:
+                        self.http_cache.store(url, headers, body, variant)
+                    return data
+                error = HTTPStatusError(f"{status} for {url}")
+            
+            logger.error(f"❌ API request failed: {error}")
+            if attempt >= retries:
+                raise error
+            logger.info(f"🔄 Retrying... ({retries - attempt} attempts left)")
+            attempt += 1
+            await asyncio.sleep(RETRY_DELAY)
+    
+    async def fetch_all(self, urls, transform=None):
+        """JSON of every url in order (None where it failed), at most `concurrency` in flight"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures = (HTTPStatusError, ValueError) + self._transport_errors()
+        
+        async def fetch(url):
+            async with semaphore:
+                try:
+                    data = await self.get_json(url)
+                except failures as e:
+                    logger.warning(f"⚠️ Giving up on {url}: {e}")
+                    return None
+            # Reduce each payload as it arrives rather than holding every full response
+            return transform(data) if transform else data
+        
+        return await asyncio.gather(*(fetch(url) for url in urls))
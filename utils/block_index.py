@@ -0,0 +1,172 @@
+"""
+Contract/Function Block Index for Scoped Rule Matching
+"""
+
+import re
+from utils.line_index import decode_snippet
+from utils.solidity_lexer import LexedCache
+
+# Bump when the index layout changes so persisted indexes are rebuilt
+BLOCK_INDEX_VERSION = 1
+
+HEADER_SOURCE = (
+    r'\b(?:(?P<container>contract|interface|library)\s+(?P<container_name>\w+)'
+    r'|(?P<kind>function|modifier)\b\s*(?P<name>\w*)'
+    r'|(?P<special>constructor|fallback|receive)(?=\s*\())'
+)
+HEADER = re.compile(HEADER_SOURCE)
+HEADER_BYTES = re.compile(HEADER_SOURCE.encode('utf-8'))
+DELIMITERS = re.compile(r'[(){};]')
+DELIMITERS_BYTES = re.compile(rb'[(){};]')
+WORD = re.compile(r'\w+')
+
+VISIBILITIES = ('external', 'public', 'internal', 'private')
+MUTABILITIES = ('pure', 'view', 'payable')
+
+def _header_keywords(header):
+    """Visibility and state mutability declared in a function header"""
+    # Only words outside the parameter list count, so `returns (uint view)` can't confuse it
+    depth = 0
+    words = []
+    for part in re.split(r'([()])', header):
+        if part == '(':
+            depth += 1
+        elif part == ')':
+            depth -= 1
+        elif depth == 0:
+            words.extend(WORD.findall(part))
+    
+    visibility = next((word for word in words if word in VISIBILITIES), None)
+    mutability = next((word for word in words if word in MUTABILITIES), None)
+    if mutability is None and 'constant' in words:
+        mutability = 'view'  # Pre-0.5 spelling of view
+    return visibility, mutability or 'nonpayable'
+
+def build_block_index(code):
+    """Index contract, function and modifier blocks in a code view (text, bytes or mmap)"""
+    is_text = isinstance(code, str)
+    header_regex = HEADER if is_text else HEADER_BYTES
+    delimiters = DELIMITERS if is_text else DELIMITERS_BYTES
+    open_brace = '{' if is_text else b'{'
+    close_brace = '}' if is_text else b'}'
+    open_paren = '(' if is_text else b'('
+    close_paren = ')' if is_text else b')'
+    
+    blocks = []
+    containers = []
+    position = 0
+    
+    while True:
+        match = header_regex.search(code, position)
+        if match is None:
+            break
+        
+        # The header ends at the first `{` or `;` outside parentheses
+        depth = 0
+        header_end = None
+        terminator = None
+        for delimiter in delimiters.finditer(code, match.end()):
+            token = delimiter.group()
+            if token == open_paren:
+                depth += 1
+            elif token == close_paren:
+                depth = max(0, depth - 1)
+            elif depth == 0:
+                header_end = delimiter.start()
+                terminator = token
+                break
+        if header_end is None:
+            break
+        
+        # Blocks nest only inside contracts, so finished containers can be dropped
+        while containers and containers[-1]['end'] <= match.start():
+            containers.pop()
+        
+        body_end = None
+        if terminator == open_brace:
+            depth = 0
+            for delimiter in delimiters.finditer(code, header_end):
+                token = delimiter.group()
+                if token == open_brace:
+                    depth += 1
+                elif token == close_brace:
+                    depth -= 1
+                    if depth == 0:
+                        body_end = delimiter.end()
+                        break
+            if body_end is None:
+                body_end = len(code)  # Unbalanced braces run to the end of the file
+        
+        if match.group('container'):
+            kind = decode_snippet(match.group('container'))
+            name = decode_snippet(match.group('container_name'))
+        elif match.group('kind'):
+            kind = decode_snippet(match.group('kind'))
+            name = decode_snippet(match.group('name'))
+        else:
+            kind = 'function'
+            name = decode_snippet(match.group('special'))
+        
+        block = {
+            'kind': kind,
+            'name': name,
+            'contract': containers[-1]['name'] if containers else None,
+            'start': match.start(),
+            'body_start': header_end if body_end is not None else None,
+            'end': body_end if body_end is not None else header_end + 1
+        }
+        if kind == 'function':
+            block['visibility'], block['mutability'] = _header_keywords(
+                decode_snippet(code[match.end():header_end])
+            )
+        
+        # Function-typed variables and parameters are not declarations
+        if not (kind == 'function' and not name and body_end is None):
+            blocks.append(block)
+        
+        if kind in ('contract', 'interface', 'library') and body_end is not None:
+            containers.append(block)
+            position = header_end + 1
+        else:
+            position = block['end']
+    
+    return BlockIndex(blocks)
+
+class BlockIndex:
+    """Structural ranges of one file; `blocks` is plain JSON-serializable data for caching"""
+    
+    def __init__(self, blocks):
+        self.blocks = blocks
+    
+    def __len__(self):
+        return len(self.blocks)
+    
+    def functions(self, mutability=None, visibility=None):
+        """Function blocks with bodies, optionally limited to some mutabilities/visibilities"""
+        return self.select(('function',), mutability, visibility)
+    
+    def select(self, kinds, mutability=None, visibility=None):
+        """Blocks with bodies of the given kinds in file order"""
+        return [
+            block for block in self.blocks
+            if block['kind'] in kinds and block['body_start'] is not None
+            and (mutability is None or block.get('mutability') in mutability)
+            and (visibility is None or block.get('visibility') in visibility)
+        ]
+    
+    def spans(self, kinds=('function',), mutability=None, visibility=None):
+        """(start, end) offsets of matching blocks, header included"""
+        return [(block['start'], block['end']) for block in self.select(kinds, mutability, visibility)]
+    
+    def enclosing(self, position, kinds=('function', 'modifier')):
+        """Innermost block of the given kinds containing a position, or None"""
+        found = None
+        for block in self.blocks:
+            if block['start'] > position:
+                break
+            if block['kind'] in kinds and position < block['end']:
+                found = block
+        return found
+
+# Indexes of code views, keyed by the hash of the blob they were lexed from
+BLOCK_INDEXES = LexedCache(build_block_index)
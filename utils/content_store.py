@@ -0,0 +1,88 @@
+"""
+Run-wide Content-addressed Result Store
+"""
+
+class LazySources:
+    """Sized sequence of (file_path, content, code view, content hash) that reads each file only when iterated"""
+    
+    def __init__(self, snapshot, file_paths):
+        self.snapshot = snapshot
+        self.file_paths = file_paths
+    
+    def __len__(self):
+        return len(self.file_paths)
+    
+    def __iter__(self):
+        # Content is None if the file vanished since hashing; detectors then load it themselves
+        for file_path in self.file_paths:
+            content = self.snapshot.read(file_path)
+            code = self.snapshot.code_view(file_path, content) if content is not None else None
+            yield file_path, content, code, self.snapshot.content_hash(file_path)
+
+class ContentStore:
+    """Per-blob detector results shared by every repo/path holding identical content"""
+    
+    def __init__(self, namespace, ruleset_version, cache=None):
+        self.namespace = namespace
+        self.ruleset_version = ruleset_version
+        self.cache = cache
+        self._results = {}
+        self.unique_blobs = 0
+        self.reused_files = 0
+    
+    def get(self, content_hash):
+        """Path-free result for a blob from this run or the persistent cache"""
+        result = self._results.get(content_hash)
+        if result is None and self.cache is not None:
+            result = self.cache.get(self.namespace, content_hash, self.ruleset_version)
+            if result is not None:
+                self._results[content_hash] = result
+        return result
+    
+    def put(self, content_hash, result, persist=True):
+        """Record a blob result for the rest of the run (and on disk when persist)"""
+        self._results[content_hash] = result
+        if persist and self.cache is not None:
+            self.cache.put(self.namespace, content_hash, self.ruleset_version, result)
+    
+    def resolve(self, snapshot, file_paths, analyze, persistable=None):
+        """Map each readable file to its blob result, analyzing every unknown blob once"""
+        return dict(self.iter_resolve(snapshot, file_paths, analyze, persistable))
+    
+    def iter_resolve(self, snapshot, file_paths, analyze, persistable=None):
+        """Yield (file_path, blob result) in file order as soon as each result is available"""
+        hashes = {}
+        misses = []
+        pending_hashes = set()
+        
+        for file_path in file_paths:
+            content_hash = snapshot.content_hash(file_path)
+            if content_hash is None:
+                continue
+            hashes[file_path] = content_hash
+            
+            if content_hash not in pending_hashes and self.get(content_hash) is None:
+                pending_hashes.add(content_hash)
+                misses.append(file_path)
+        
+        self.unique_blobs += len(misses)
+        self.reused_files += len(hashes) - len(misses)
+        
+        # analyze() gets one LazySources tuple per unknown blob and returns path-free results in order
+        analyzed = zip(misses, analyze(LazySources(snapshot, misses)))
+        
+        try:
+            for file_path, content_hash in hashes.items():
+                # Misses are first occurrences in file order, so the next result is this blob
+                while content_hash not in self._results:
+                    miss_path, result = next(analyzed)
+                    persist = persistable is None or persistable(result)
+                    self.put(hashes[miss_path], result, persist)
+                yield file_path, self._results[content_hash]
+        finally:
+            if self.cache is not None:
+                self.cache.commit()
+    
+    def clear(self):
+        """Forget results from this run"""
+        self._results.clear()
@@ -0,0 +1,190 @@
+"""
+Pruning Source File Enumerator Shared by All Walkers
+"""
+
+import os
+import re
+import fnmatch
+from config.settings import (
+    EXCLUDE_DIRS, EXCLUDE_GLOBS, GENERATED_FILE_GLOBS, MAX_SOURCE_FILE_KB, USE_GIT_LS_FILES
+)
+from utils.git_utils import run_git
+
+def _read_gitignore(gitignore_path, base):
+    """Rules of one .gitignore as (base, pattern, negate, dir_only, anchored) tuples"""
+    rules = []
+    try:
+        with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if line.startswith('**/'):
+            line = line[3:]
+        # A slash anywhere but the end ties the pattern to the .gitignore's directory
+        anchored = '/' in line
+        rules.append((base, line.lstrip('/'), negate, dir_only, anchored))
+    
+    return rules
+
+def _gitignored(rules, rel_path, is_dir):
+    """Whether the last matching rule ignores rel_path"""
+    ignored = False
+    for base, pattern, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not rel_path.startswith(base + '/'):
+                continue
+            sub_path = rel_path[len(base) + 1:]
+        else:
+            sub_path = rel_path
+        target = sub_path if anchored else sub_path.rsplit('/', 1)[-1]
+        if fnmatch.fnmatchcase(target, pattern):
+            ignored = not negate
+    return ignored
+
+def _compile_globs(globs):
+    """One regex matching any of the globs, or None when there are none"""
+    if not globs:
+        return None
+    return re.compile('|'.join(fnmatch.translate(glob) for glob in globs))
+
+class FileEnumerator:
+    """Lists source files under a root, pruning excluded trees instead of walking them"""
+    
+    def __init__(self, extensions=('.sol',), exclude_dirs=EXCLUDE_DIRS, exclude_globs=EXCLUDE_GLOBS,
+                 generated_globs=GENERATED_FILE_GLOBS, max_file_kb=MAX_SOURCE_FILE_KB, use_git=USE_GIT_LS_FILES,
+                 gitignore=True):
+        self.extensions = tuple(extensions)
+        self.exclude_dirs = set(exclude_dirs)
+        self.exclude_globs = _compile_globs(exclude_globs)
+        self.generated_globs = _compile_globs(generated_globs)
+        self.max_file_bytes = max_file_kb * 1024 if max_file_kb else None
+        self.use_git = use_git
+        self.gitignore = gitignore
+        # Source files left out as generated or oversized, so scans can report what they never read
+        self.skipped = []
+    
+    def list_files(self, root):
+        """Sorted absolute paths of every wanted file under root"""
+        self.skipped = []
+        return sorted(self._list(root))
+    
+    def _list(self, root):
+        files = self._git_files(root) if self.use_git else None
+        if files is None:
+            files = self._walk(root)
+        return files
+    
+    def _wanted(self, rel_path, size, file_path):
+        """Extension, exclude, generated-name and size checks on a root-relative path"""
+        name = rel_path.rsplit('/', 1)[-1]
+        if not name.endswith(self.extensions):
+            return False
+        if self.exclude_globs and self.exclude_globs.match(rel_path):
+            return False
+        
+        if self.generated_globs and self.generated_globs.match(name):
+            reason = 'generated'
+        elif self.max_file_bytes is not None and size > self.max_file_bytes:
+            reason = 'too large'
+        else:
+            return True
+        self.skipped.append({'file': file_path, 'reason': reason, 'size': size})
+        return False
+    
+    def accepts(self, rel_path, size, file_path=None):
+        """Full check for a path listed from a git tree rather than found by walking"""
+        if self.exclude_dirs.intersection(rel_path.split('/')[:-1]):
+            return False
+        return self._wanted(rel_path, size, file_path or rel_path)
+    
+    def _git_files(self, root):
+        """Tracked plus untracked-but-not-ignored files from the index, or None outside a work tree root"""
+        # Inside some other work tree (e.g. an untracked clone dir), ls-files would list the parent
+        if run_git(root, 'rev-parse', '--show-prefix') != '\n':
+            return None
+        output = run_git(root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard')
+        if output is None:
+            return None
+        
+        files = []
+        for rel_path in output.split('\0'):
+            if not rel_path or not rel_path.endswith(self.extensions):
+                continue
+            if self.exclude_dirs.intersection(rel_path.split('/')[:-1]):
+                continue
+            
+            file_path = os.path.join(root, rel_path)
+            try:
+                # Also drops files deleted from the work tree but still in the index
+                size = os.stat(file_path).st_size
+            except OSError:
+                continue
+            if self._wanted(rel_path, size, file_path):
+                files.append(file_path)
+        
+        # ls-files shows submodules as a single entry; list their own work trees
+        for submodule in self._submodules(root):
+            files.extend(self._list(os.path.join(root, submodule)))
+        
+        return files
+    
+    def _submodules(self, root):
+        """Checked-out submodule paths declared in .gitmodules"""
+        if not os.path.exists(os.path.join(root, '.gitmodules')):
+            return []
+        output = run_git(root, 'config', '-f', '.gitmodules', '--get-regexp', r'\.path$') or ''
+        paths = [line.split(' ', 1)[1] for line in output.splitlines() if ' ' in line]
+        return [
+            path for path in paths
+            if not self.exclude_dirs.intersection(path.split('/'))
+            and os.path.isdir(os.path.join(root, path))
+        ]
+    
+    def _walk(self, root):
+        """os.scandir walk that prunes excluded and gitignored directories before entering them"""
+        files = []
+        rules = []
+        stack = ['']
+        
+        while stack:
+            rel_dir = stack.pop()
+            directory = os.path.join(root, rel_dir) if rel_dir else root
+            
+            # Rules carry their base directory, so they only ever match below it
+            gitignore = os.path.join(directory, '.gitignore')
+            if self.gitignore and os.path.isfile(gitignore):
+                rules.extend(_read_gitignore(gitignore, rel_dir))
+            
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.exclude_dirs and not _gitignored(rules, rel_path, True):
+                            stack.append(rel_path)
+                    elif entry.name.endswith(self.extensions) and entry.is_file():
+                        if not _gitignored(rules, rel_path, False) and self._wanted(
+                            rel_path, entry.stat().st_size, entry.path
+                        ):
+                            files.append(entry.path)
+                except OSError:
+                    continue
+        
+        return files
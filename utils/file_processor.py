@@ -7,6 +7,7 @@ import json
 import csv
 from datetime import datetime
 from utils.logger import setup_logger
+from utils.file_enumerator import FileEnumerator
 
 logger = setup_logger(__name__)
 
@@ -64,20 +65,19 @@ class FileProcessor:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         return f"{base_name}_{timestamp}.{extension}"
     
-    def find_files_by_extension(self, directory, extension):
-        """Find all files with specific extension"""
-        matching_files = []
-        
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.endswith(extension):
-                    matching_files.append(os.path.join(root, file))
-        
-        return matching_files
+    def find_files_by_extension(self, directory, extension, enumerator=None):
+        """Find all files with specific extension; pass an enumerator to prune or cap what is listed"""
+        if enumerator is None:
+            # Every matching file, like a plain walk - the source-scan filters don't apply here
+            enumerator = FileEnumerator(
+                extensions=(extension,), exclude_dirs=(), exclude_globs=(), generated_globs=(), max_file_kb=None,
+                use_git=False, gitignore=False
+            )
+        return enumerator.list_files(directory)
     
     def count_solidity_files(self, directory):
-        """Count Solidity files in directory"""
-        return len(self.find_files_by_extension(directory, '.sol'))
+        """Count Solidity files in directory, with the scanner's excludes and size cap"""
+        return len(self.find_files_by_extension(directory, '.sol', FileEnumerator(extensions=('.sol',))))
     
     def get_file_size(self, file_path):
         """Get file size in human-readable format"""
@@ -0,0 +1,125 @@
+"""
+Persistent Content-hash Keyed Finding Cache
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from config.settings import ENABLE_FINDING_CACHE, FINDING_CACHE_PATH, FINDING_CACHE_MAX_MB
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def ruleset_hash(rules):
+    """Stable short hash of a JSON-serializable rule description"""
+    encoded = json.dumps(rules, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def default_finding_cache():
+    """Finding cache configured in settings, or None when disabled"""
+    if not ENABLE_FINDING_CACHE:
+        return None
+    return FindingCache(FINDING_CACHE_PATH, FINDING_CACHE_MAX_MB * 1024 * 1024)
+
+class FindingCache:
+    """On-disk LRU cache of per-file detector results keyed by (content hash, ruleset version)"""
+    
+    def __init__(self, cache_path, max_bytes):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+    
+    def _connect(self):
+        """Open the database lazily, and again after a fork"""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.cache_path, timeout=30)
+        self._pid = os.getpid()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS findings ('
+            ' namespace TEXT NOT NULL,'
+            ' content_hash TEXT NOT NULL,'
+            ' ruleset_version TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL,'
+            ' PRIMARY KEY (namespace, content_hash, ruleset_version))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS findings_lru ON findings (last_used)')
+        return self._conn
+    
+    def get(self, namespace, content_hash, ruleset_version):
+        """Return the cached result or None, refreshing its LRU position"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT payload FROM findings WHERE namespace = ? AND content_hash = ? AND ruleset_version = ?',
+                (namespace, content_hash, ruleset_version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            conn.execute(
+                'UPDATE findings SET last_used = ? WHERE namespace = ? AND content_hash = ? AND ruleset_version = ?',
+                (time.time(), namespace, content_hash, ruleset_version)
+            )
+            self.hits += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Finding cache read failed: {e}")
+            return None
+    
+    def put(self, namespace, content_hash, ruleset_version, result):
+        """Store a per-file result"""
+        payload = json.dumps(result, default=str)
+        try:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, content_hash, ruleset_version, payload, len(payload), time.time())
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Finding cache write failed: {e}")
+    
+    def commit(self):
+        """Persist pending writes and evict least-recently-used entries over the size cap"""
+        if self._conn is None or self._pid != os.getpid():
+            return
+        
+        try:
+            conn = self._conn
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM findings').fetchone()[0]
+            if total > self.max_bytes:
+                # Evict down to 90% of the cap so we don't evict on every commit
+                target = total - int(self.max_bytes * 0.9)
+                freed = 0
+                stale = []
+                for namespace, content_hash, ruleset_version, size in conn.execute(
+                    'SELECT namespace, content_hash, ruleset_version, size FROM findings ORDER BY last_used'
+                ):
+                    stale.append((namespace, content_hash, ruleset_version))
+                    freed += size
+                    if freed >= target:
+                        break
+                conn.executemany(
+                    'DELETE FROM findings WHERE namespace = ? AND content_hash = ? AND ruleset_version = ?',
+                    stale
+                )
+                logger.debug(f"🧹 Evicted {len(stale)} finding cache entries")
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Finding cache commit failed: {e}")
+    
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self.commit()
+            self._conn.close()
+        self._conn = None
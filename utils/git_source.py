@@ -0,0 +1,144 @@
+"""
+Scan Source Reading Blobs Straight from the Git Object Store
+"""
+
+import os
+import subprocess
+from config.settings import SCAN_MODE, SCAN_SOURCE
+from utils.git_utils import run_git, is_bare_repo
+from utils.repo_snapshot import RepoSnapshot, decode_source
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def open_snapshot(repo_path, mode=SCAN_MODE, source=SCAN_SOURCE, commit=None):
+    """Snapshot of the working tree, or of a commit's tree when reading from git"""
+    if commit or source == 'git' or is_bare_repo(repo_path):
+        return GitTreeSnapshot(repo_path, commit or 'HEAD', mode=mode)
+    return RepoSnapshot(repo_path, mode=mode)
+
+class GitBlobReader:
+    """Long-lived `git cat-file --batch` process serving blob contents by object id"""
+    
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self._process = None
+    
+    def read(self, object_id):
+        """Raw blob bytes, or None when the object is missing"""
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ['git', '-C', self.repo_path, 'cat-file', '--batch'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        
+        self._process.stdin.write(object_id.encode('ascii') + b'\n')
+        self._process.stdin.flush()
+        
+        # "<oid> <type> <size>\n<contents>\n", or "<oid> missing\n"
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            if not header:
+                self.close()
+                raise OSError(f"git cat-file exited in {self.repo_path}")
+            return None
+        
+        size = int(header[2])
+        data = self._process.stdout.read(size)
+        self._process.stdout.read(1)
+        if len(data) != size:
+            self.close()
+            raise OSError(f"Short read of {object_id} from git cat-file")
+        return data
+    
+    def close(self):
+        """Stop the git process"""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+class GitTreeSnapshot(RepoSnapshot):
+    """RepoSnapshot over one commit's tree, read through a single cat-file pipe with no checkout"""
+    
+    def __init__(self, repo_path, commit='HEAD', extension='.sol', mode=SCAN_MODE, enumerator=None):
+        super().__init__(repo_path, extension, mode, enumerator)
+        output = run_git(repo_path, 'rev-parse', '--verify', '--quiet', f"{commit}^{{commit}}")
+        self.commit = output.strip() if output else None
+        if self.commit is None:
+            logger.warning(f"⚠️ Commit {commit} not found in {repo_path}")
+        self._blobs = {}
+        self._reader = GitBlobReader(repo_path)
+    
+    @property
+    def files(self):
+        """Matching blobs of the commit as paths under repo_path, listed on first access"""
+        if self._files is None:
+            self._files = sorted(self._list_blobs())
+        return self._files
+    
+    def _list_blobs(self):
+        """Record (object id, size) of every wanted blob in the commit's tree"""
+        if self.commit is None:
+            return []
+        output = run_git(self.repo_path, 'ls-tree', '-r', '-l', '-z', '--full-tree', self.commit) or ''
+        
+        for entry in output.split('\0'):
+            if not entry:
+                continue
+            # "<mode> <type> <oid> <size>\t<path>"; submodules are 'commit' entries whose objects live elsewhere
+            info, rel_path = entry.split('\t', 1)
+            file_mode, object_type, object_id, size = info.split()
+            if object_type != 'blob' or file_mode == '120000':
+                continue
+            file_path = os.path.join(self.repo_path, rel_path)
+            if self.enumerator.accepts(rel_path, int(size), file_path):
+                self._blobs[file_path] = (object_id, int(size))
+        
+        return list(self._blobs)
+    
+    def _blob(self, file_path):
+        """(object id, size) of a path, listing the tree first when nothing has asked for .files yet"""
+        if self._files is None:
+            self.files
+        return self._blobs.get(file_path)
+    
+    def source_bytes(self):
+        """Total size of all matching blobs, straight from the tree listing"""
+        return sum(self._blobs[file_path][1] for file_path in self.files)
+    
+    def read(self, file_path):
+        """Return blob contents, fetching from the object store only on first use"""
+        content = self._contents.get(file_path)
+        if content is not None:
+            return content
+        
+        blob = self._blob(file_path)
+        try:
+            content = self._reader.read(blob[0]) if blob else None
+        except Exception as e:
+            print(f"⚠️ Error reading blob for {file_path}: {e}")
+            return None
+        if content is None:
+            return None
+        
+        # Bytes mode keeps no copy, matching the unmapped-on-drop behaviour of working tree scans
+        if self.mode != 'bytes':
+            content = decode_source(content)
+            self._contents[file_path] = content
+        return content
+    
+    def content_hash(self, file_path):
+        """The blob's object id, known from the tree listing without reading it"""
+        blob = self._blob(file_path)
+        return blob[0] if blob else None
+    
+    def release(self):
+        """Drop cached contents and stop the cat-file process"""
+        super().release()
+        self._reader.close()
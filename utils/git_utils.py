@@ -0,0 +1,51 @@
+"""
+Git Repository Helpers
+"""
+
+import os
+import hashlib
+import subprocess
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def run_git(repo_path, *args, timeout=60):
+    """Run a git command in repo_path and return stdout, or None on failure"""
+    try:
+        result = subprocess.run(
+            ['git', '-C', repo_path] + list(args),
+            capture_output=True, text=True, errors='surrogateescape', timeout=timeout
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.debug(f"git {' '.join(args)} failed in {repo_path}: {e}")
+        return None
+    
+    if result.returncode != 0:
+        logger.debug(f"git {' '.join(args)} failed in {repo_path}: {result.stderr.strip()}")
+        return None
+    return result.stdout
+
+def git_blob_id(data):
+    """Object id git gives a blob holding these bytes (default SHA-1 object format)"""
+    digest = hashlib.sha1(b'blob %d\0' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+def get_head(repo_path):
+    """Commit hash of HEAD, or None if repo_path is not a git checkout"""
+    if not os.path.isdir(repo_path):
+        return None
+    output = run_git(repo_path, 'rev-parse', 'HEAD')
+    return output.strip() if output else None
+
+def is_bare_repo(repo_path):
+    """Whether repo_path is a git repository without a working tree"""
+    return run_git(repo_path, 'rev-parse', '--is-bare-repository') == 'true\n'
+
+def changed_files(repo_path, base_commit, target_commit=None):
+    """Paths (relative to the repo root) that differ between base_commit and target_commit or the working tree"""
+    commits = [base_commit, target_commit] if target_commit else [base_commit]
+    output = run_git(repo_path, 'diff', '--name-only', '--no-renames', '-z', *commits)
+    if output is None:
+        return None
+    return {path for path in output.split('\0') if path}
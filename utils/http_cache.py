@@ -0,0 +1,275 @@
+"""
+Persistent HTTP Response Cache with Conditional Revalidation
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from config.api_config import ENABLE_HTTP_CACHE, HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Response headers kept with a body; transfer headers don't apply to the stored, decoded copy
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Date', 'Expires', 'Link')
+
+# Request headers that select a different representation of the same URL
+VARY_HEADERS = ('Accept', 'Authorization')
+
+def default_http_cache():
+    """HTTP cache configured in settings, or None when disabled"""
+    if not ENABLE_HTTP_CACHE:
+        return None
+    return HTTPCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB * 1024 * 1024)
+
+def cache_variant(request_headers):
+    """Short hash of the request headers a cached response depends on"""
+    values = [f"{name}:{request_headers.get(name, '')}" for name in VARY_HEADERS]
+    return hashlib.sha256('\n'.join(values).encode('utf-8')).hexdigest()[:16]
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def freshness_lifetime(headers):
+    """Seconds a response stays fresh, 0 when it must be revalidated, None when it may not be stored"""
+    directives = {}
+    for directive in (headers.get('Cache-Control') or '').split(','):
+        name, _, value = directive.strip().partition('=')
+        directives[name.lower()] = value.strip('"')
+    
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+    
+    try:
+        age = float(headers.get('Age') or 0)
+    except ValueError:
+        age = 0
+    try:
+        return max(0, int(directives['max-age']) - age)
+    except (KeyError, ValueError):
+        pass
+    
+    expires = _http_date(headers.get('Expires'))
+    if expires is None:
+        return 0
+    return max(0, expires - (_http_date(headers.get('Date')) or time.time()))
+
+class HTTPCache:
+    """On-disk LRU cache of response bodies with their validators, indexed in sqlite"""
+    
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+    
+    def _connect(self):
+        """Open the index lazily, and again after a fork"""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(self.cache_dir, 'index.sqlite'), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._pid = os.getpid()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' headers TEXT NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' expires_at REAL NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)')
+        return self._conn
+    
+    def _key(self, url, variant):
+        return hashlib.sha256(f"{variant} {url}".encode('utf-8')).hexdigest()
+    
+    def body_path(self, entry):
+        """File holding an entry's body"""
+        return os.path.join(self.cache_dir, entry['key'] + '.body')
+    
+    def lookup(self, url, variant=''):
+        """Entry for url as a dict with a 'fresh' flag, or None; refreshes its LRU position"""
+        key = self._key(url, variant)
+        try:
+            with self.lock:
+                conn = self._connect()
+                row = conn.execute(
+                    'SELECT headers, etag, last_modified, expires_at, size FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ HTTP cache read failed: {e}")
+            return None
+        
+        headers, etag, last_modified, expires_at, size = row
+        entry = {
+            'key': key, 'url': url, 'headers': json.loads(headers), 'etag': etag,
+            'last_modified': last_modified, 'expires_at': expires_at, 'size': size,
+            'fresh': expires_at > time.time()
+        }
+        if not os.path.exists(self.body_path(entry)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+    
+    def conditional_headers(self, entry):
+        """If-None-Match / If-Modified-Since for revalidating an entry"""
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def read(self, entry):
+        """Cached body bytes, or None when the file has gone"""
+        try:
+            with open(self.body_path(entry), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def _new_entry(self, url, headers, variant):
+        """Entry for a 200 response worth keeping - fresh for a while or carrying a validator - else None"""
+        lifetime = freshness_lifetime(headers)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if lifetime is None or (not lifetime and not etag and not last_modified):
+            return None
+        return {
+            'key': self._key(url, variant), 'url': url,
+            'headers': {name: headers[name] for name in STORED_HEADERS if headers.get(name) is not None},
+            'etag': etag, 'last_modified': last_modified, 'expires_at': time.time() + lifetime,
+            'size': 0, 'fresh': lifetime > 0
+        }
+    
+    def _index(self, entry):
+        with self.lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (entry['key'], entry['url'], json.dumps(entry['headers']), entry['etag'], entry['last_modified'],
+                 entry['expires_at'], entry['size'], time.time())
+            )
+            self._evict()
+    
+    def store(self, url, headers, body, variant=''):
+        """Save a 200 response's body when it is worth keeping"""
+        for _ in self.write_through(url, headers, [body], variant):
+            pass
+    
+    def write_through(self, url, headers, chunks, variant=''):
+        """Yield a 200 response's body chunks while saving them; the entry is indexed once the body is complete"""
+        entry = self._new_entry(url, headers, variant)
+        if entry is None:
+            yield from chunks
+            return
+        
+        # Written aside and renamed, so a reader never sees a partial body
+        temp_path = f"{self.body_path(entry)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        f = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            f = open(temp_path, 'wb')
+        except OSError as e:
+            logger.warning(f"⚠️ HTTP cache write failed: {e}")
+        
+        try:
+            for chunk in chunks:
+                if f is not None:
+                    try:
+                        f.write(chunk)
+                    except OSError as e:
+                        # Keep feeding the caller; only the cached copy is lost
+                        logger.warning(f"⚠️ HTTP cache write failed: {e}")
+                        f.close()
+                        f = None
+                entry['size'] += len(chunk)
+                yield chunk
+            
+            if f is None:
+                return
+            f.close()
+            f = None
+            try:
+                os.replace(temp_path, self.body_path(entry))
+                self._index(entry)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"⚠️ HTTP cache write failed: {e}")
+        finally:
+            # Also reached when the caller stops reading early
+            if f is not None:
+                f.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def revalidate(self, entry, headers):
+        """Apply a 304's headers to an entry and restart its freshness lifetime"""
+        entry['headers'].update({name: headers[name] for name in STORED_HEADERS if headers.get(name) is not None})
+        entry['etag'] = entry['headers'].get('ETag')
+        entry['last_modified'] = entry['headers'].get('Last-Modified')
+        entry['expires_at'] = time.time() + (freshness_lifetime(entry['headers']) or 0)
+        self.revalidated += 1
+        try:
+            with self.lock:
+                self._connect().execute(
+                    'UPDATE responses SET headers = ?, etag = ?, last_modified = ?, expires_at = ? WHERE key = ?',
+                    (json.dumps(entry['headers']), entry['etag'], entry['last_modified'], entry['expires_at'],
+                     entry['key'])
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ HTTP cache update failed: {e}")
+        return entry
+    
+    def _evict(self):
+        """Drop least-recently-used entries while the cache is over its size cap"""
+        conn = self._conn
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        # Evict down to 90% of the cap so we don't evict on every store
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY last_used'):
+            stale.append(key)
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key in stale])
+        for key in stale:
+            try:
+                os.remove(os.path.join(self.cache_dir, key + '.body'))
+            except OSError:
+                pass
+        logger.debug(f"🧹 Evicted {len(stale)} HTTP cache entries")
+    
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
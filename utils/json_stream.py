@@ -0,0 +1,77 @@
+"""
+Incremental Reader for Large Top-level JSON Arrays
+"""
+
+import json
+import codecs
+
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+def iter_json_array(chunks):
+    """Yield each element of a JSON array as soon as it is parsed from an iterable of byte chunks"""
+    text = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+    eof = False
+    # '[' opening bracket, 'first' value or ']', 'value' after a comma, 'next' ',' or ']'
+    expect = '['
+    
+    while True:
+        while pos < len(buffer) and buffer[pos] in WHITESPACE:
+            pos += 1
+        
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect == '[':
+                if char != '[':
+                    raise ValueError(f"Expected a JSON array, found {char!r}")
+                expect = 'first'
+                pos += 1
+                continue
+            if expect in ('first', 'next') and char == ']':
+                # Run the source to its end, so anything saving the body as it is read sees all of it
+                for _ in chunks:
+                    pass
+                return
+            if expect == 'next':
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+                expect = 'value'
+                pos += 1
+                continue
+            
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Usually an element cut off by the chunk boundary; only malformed once nothing more comes
+                if eof:
+                    raise
+            else:
+                # A number cut by a chunk boundary ("1." or "1e") decodes as its prefix, so it only
+                # counts once the ',' or ']' after it has arrived
+                complete = True
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    after = end
+                    while after < len(buffer) and buffer[after] in WHITESPACE:
+                        after += 1
+                    complete = eof or (after < len(buffer) and buffer[after] in ',]')
+                if complete:
+                    yield value
+                    pos = end
+                    expect = 'next'
+                    continue
+        elif eof:
+            raise ValueError("Truncated JSON array")
+        
+        # Keep only the unparsed tail, so memory stays at about one chunk plus one element
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer += text.decode(b'', final=True)
+        else:
+            buffer += text.decode(chunk)
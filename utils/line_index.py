@@ -0,0 +1,54 @@
+"""
+Line Offset Index for Match Positions
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+
+NEWLINE = re.compile('\n')
+NEWLINE_BYTES = re.compile(b'\n')
+
+def decode_snippet(text):
+    """Decode a bytes slice for display; text passes through unchanged"""
+    if isinstance(text, str):
+        return text
+    return bytes(text).decode('utf-8', errors='ignore')
+
+class LineIndex:
+    """Maps offsets to line/column using precomputed newline offsets (text, bytes or mmap)"""
+    
+    def __init__(self, content):
+        self.content = content
+        self.is_text = isinstance(content, str)
+        newline = NEWLINE if self.is_text else NEWLINE_BYTES
+        # Offset of the first character (or byte) of every line
+        self.line_starts = array('q', [0])
+        self.line_starts.extend(match.end() for match in newline.finditer(content))
+    
+    def __len__(self):
+        return len(self.line_starts)
+    
+    def line_number(self, position):
+        """0-based line number containing a character position"""
+        return bisect_right(self.line_starts, position) - 1
+    
+    def position(self, position):
+        """0-based (line, column) for a position, column counted in characters"""
+        line_number = self.line_number(position)
+        line_start = self.line_starts[line_number]
+        if self.is_text:
+            return line_number, position - line_start
+        return line_number, len(decode_snippet(self.content[line_start:position]))
+    
+    def line(self, line_number):
+        """Text of a single 0-based line without its trailing newline"""
+        if line_number < 0 or line_number >= len(self.line_starts):
+            return ""
+        
+        start = self.line_starts[line_number]
+        if line_number + 1 < len(self.line_starts):
+            end = self.line_starts[line_number + 1] - 1
+        else:
+            end = len(self.content)
+        return decode_snippet(self.content[start:end])
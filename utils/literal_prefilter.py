@@ -0,0 +1,80 @@
+"""
+Multi-literal Anchor Prefilter
+"""
+
+try:
+    import ahocorasick  # Optional: pyahocorasick automaton
+except ImportError:
+    ahocorasick = None
+
+# Window size for scanning bytes/mmap content
+BYTES_WINDOW = 1024 * 1024
+
+class LiteralPrefilter:
+    """Finds which anchor literals occur in a file so only relevant rules run"""
+    
+    def __init__(self, literals, ignore_case=False):
+        self.ignore_case = ignore_case
+        self.literals = list(dict.fromkeys(literals))
+        
+        # Search keys are lowercased for case-insensitive anchors
+        self._keys = {}
+        for literal in self.literals:
+            key = literal.lower() if ignore_case else literal
+            self._keys.setdefault(key, []).append(literal)
+        
+        self._automaton = self._build_automaton() if ahocorasick else None
+    
+    def _build_automaton(self):
+        """Build an Aho-Corasick automaton over all anchor keys"""
+        automaton = ahocorasick.Automaton()
+        for key in self._keys:
+            automaton.add_word(key, key)
+        automaton.make_automaton()
+        return automaton
+    
+    def find(self, content):
+        """Return the set of anchor literals present in content"""
+        if not self._keys:
+            return set()
+        
+        if not isinstance(content, str):
+            return self._find_in_bytes(content)
+        
+        haystack = content.lower() if self.ignore_case else content
+        
+        if self._automaton is not None:
+            # Single pass over the file, stopping once every anchor is seen
+            found_keys = set()
+            for _, key in self._automaton.iter(haystack):
+                found_keys.add(key)
+                if len(found_keys) == len(self._keys):
+                    break
+        else:
+            # str.__contains__ runs CPython's C fast-search per anchor
+            found_keys = {key for key in self._keys if key in haystack}
+        
+        return self._literals_for(found_keys)
+    
+    def _find_in_bytes(self, content):
+        """Search bytes or an mmap in fixed-size windows so no full-size copy is made"""
+        remaining = {key.encode('utf-8'): key for key in self._keys}
+        overlap = max(len(key) for key in remaining) - 1
+        found_keys = set()
+        
+        for start in range(0, max(len(content), 1), BYTES_WINDOW):
+            window = content[start:start + BYTES_WINDOW + overlap]
+            if self.ignore_case:
+                window = window.lower()
+            for encoded in [encoded for encoded in remaining if encoded in window]:
+                found_keys.add(remaining.pop(encoded))
+            if not remaining:
+                break
+        
+        return self._literals_for(found_keys)
+    
+    def _literals_for(self, found_keys):
+        found = set()
+        for key in found_keys:
+            found.update(self._keys[key])
+        return found
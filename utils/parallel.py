@@ -0,0 +1,44 @@
+"""
+Process-pool Helpers for Parallel File Scanning
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Chunks queued per worker; bounds how many chunk inputs sit pickled in the pool at once
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+def resolve_workers(workers):
+    """0 or None means one worker per CPU core"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+def chunked(items, chunk_size):
+    """Split an iterable into lists of at most chunk_size items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _apply_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+def parallel_map(func, items, workers, chunk_size, initializer=None, initargs=()):
+    """Apply a module-level func to items across a process pool, preserving input order"""
+    chunks = chunked(items, max(1, chunk_size))
+    window = max(1, workers) * CHUNKS_IN_FLIGHT_PER_WORKER
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        # Executor.map would read and submit every chunk up front; a bounded window only pulls
+        # the next chunk from items once the oldest one's results have been handed on
+        in_flight = deque(pool.submit(_apply_chunk, func, chunk) for chunk in islice(chunks, window))
+        while in_flight:
+            chunk_result = in_flight.popleft().result()
+            for chunk in islice(chunks, 1):
+                in_flight.append(pool.submit(_apply_chunk, func, chunk))
+            yield from chunk_result
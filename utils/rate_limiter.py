@@ -0,0 +1,139 @@
+"""
+Per-host Token Buckets Driven by Rate-limit Response Headers
+"""
+
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from config.api_config import HOST_RATE_LIMITS, DEFAULT_HOST_RATE_LIMIT, RATE_LIMIT_FALLBACK_BACKOFF
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def _header_number(headers, name):
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Steady refill until the server reports its own window, then exactly the quota it reports"""
+    
+    def __init__(self, capacity, per_second, fallback_backoff=RATE_LIMIT_FALLBACK_BACKOFF):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.fallback_backoff = fallback_backoff
+        self.tokens = float(capacity)
+        self.updated_at = time.time()
+        # Epoch time the server's window resets, while its remaining count governs the bucket
+        self.reset_at = None
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def _refill(self, now):
+        if self.reset_at is not None:
+            if now >= self.reset_at:
+                # Requests already promised to the new window come out of it
+                self.tokens = self.capacity + min(self.tokens, 0)
+                self.reset_at = None
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.per_second)
+        self.updated_at = now
+    
+    def reserve(self):
+        """Take a token and return how many seconds to wait before using it"""
+        with self.lock:
+            now = time.time()
+            self._refill(now)
+            self.tokens -= 1
+            ready = max(now, self.blocked_until)
+            if self.tokens < 0:
+                if self.reset_at is not None:
+                    ready = max(ready, self.reset_at)
+                elif self.per_second > 0:
+                    ready = max(ready, now + -self.tokens / self.per_second)
+                else:
+                    ready = max(ready, now + self.fallback_backoff)
+            return ready - now
+    
+    def observe(self, status_code, headers):
+        """Sync with the server's reported quota; returns True when the response was rate-limited"""
+        with self.lock:
+            now = time.time()
+            self._refill(now)
+            
+            limit = _header_number(headers, 'X-RateLimit-Limit')
+            remaining = _header_number(headers, 'X-RateLimit-Remaining')
+            reset = _header_number(headers, 'X-RateLimit-Reset')
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            
+            if limit:
+                self.capacity = limit
+            if remaining is not None:
+                self.tokens = remaining
+                if reset is not None and reset > now:
+                    self.reset_at = reset
+            
+            limited = status_code == 429 or (status_code == 403 and (remaining == 0 or retry_after is not None))
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            elif limited and self.reset_at is None:
+                self.blocked_until = max(self.blocked_until, now + self.fallback_backoff)
+            return limited
+    
+    def back_off(self):
+        """Rate-limited without usable headers - wait the fallback period"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.time() + self.fallback_backoff)
+
+class HostRateLimiter:
+    """One token bucket per host, so GitHub and DeFi Llama quotas never throttle each other"""
+    
+    def __init__(self, host_limits=HOST_RATE_LIMITS, default_limit=DEFAULT_HOST_RATE_LIMIT):
+        self.host_limits = host_limits
+        self.default_limit = default_limit
+        self.buckets = {}
+        self.lock = threading.Lock()
+    
+    def bucket(self, url):
+        """Bucket for the host of url, created on first use"""
+        host = urlparse(url).hostname or ''
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                limit = self.host_limits.get(host, self.default_limit)
+                bucket = self.buckets[host] = TokenBucket(limit['capacity'], limit['per_second'])
+            return bucket
+    
+    def reserve(self, url):
+        """Seconds to wait before a request to url may be sent"""
+        return self.bucket(url).reserve()
+    
+    def acquire(self, url):
+        """Block only as long as the host's quota requires"""
+        delay = self.reserve(url)
+        if delay > 1:
+            logger.info(f"⏳ Rate limit for {urlparse(url).hostname} - waiting {delay:.0f}s")
+        if delay > 0:
+            time.sleep(delay)
+    
+    def observe(self, url, status_code, headers):
+        """Feed a response's rate-limit headers back; True when it was rate-limited"""
+        return self.bucket(url).observe(status_code, headers)
+    
+    def back_off(self, url):
+        self.bucket(url).back_off()
@@ -0,0 +1,112 @@
+"""
+Backtracking-safe Regex Execution with Time Budgets
+"""
+
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import re2  # Optional: linear-time RE2 engine (google-re2)
+except ImportError:
+    re2 = None
+
+INLINE_FLAGS = [(re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's')]
+
+class RegexTimeout(Exception):
+    """Raised when a rule exceeds its time budget"""
+
+class CompiledRule:
+    """Compiled pattern that remembers its source and the engine running it"""
+    
+    def __init__(self, pattern, flags, regex, bytes_regex, engine):
+        self.pattern = pattern
+        self.flags = flags
+        self.regex = regex
+        self.bytes_regex = bytes_regex
+        self.engine = engine
+    
+    def finditer(self, content, start=0, end=None):
+        # Bytes and mmap content run the bytes-compiled twin of the rule
+        regex = self.regex if isinstance(content, str) else self.bytes_regex
+        if end is None:
+            return regex.finditer(content, start)
+        return regex.finditer(content, start, end)
+
+def _raise_timeout(signum, frame):
+    raise RegexTimeout()
+
+def _can_use_alarm():
+    """SIGALRM only fires in the main thread and must not clobber a running timer"""
+    return (
+        hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+        and signal.getitimer(signal.ITIMER_REAL)[0] == 0
+    )
+
+@contextmanager
+def time_budget(seconds):
+    """Interrupt the enclosed block with RegexTimeout after `seconds`; yields whether the alarm is armed"""
+    if not seconds or seconds <= 0 or not _can_use_alarm():
+        yield False
+        return
+    
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield True
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+class RegexEngine:
+    """Runs rules on RE2 when available, otherwise on `re` under a time budget"""
+    
+    def __init__(self, mode='auto', rule_budget=None, file_budget=None):
+        self.use_re2 = re2 is not None and mode in ('auto', 're2')
+        if mode == 're2' and re2 is None:
+            print("⚠️ RE2 engine requested but not installed - using budgeted re")
+        self.rule_budget = rule_budget
+        self.file_budget = file_budget
+        self.warned_soft_budget = False
+    
+    def compile(self, pattern, flags=0):
+        """Compile a pattern on the linear-time engine when it supports it"""
+        if self.use_re2:
+            inline = ''.join(letter for flag, letter in INLINE_FLAGS if flags & flag)
+            source = f"(?{inline}){pattern}" if inline else pattern
+            try:
+                regex = re2.compile(source)
+                bytes_regex = re2.compile(source.encode('utf-8'))
+                return CompiledRule(pattern, flags, regex, bytes_regex, 're2')
+            except Exception:
+                # Backreferences/lookarounds are not supported by RE2
+                pass
+        
+        return CompiledRule(
+            pattern, flags, re.compile(pattern, flags), re.compile(pattern.encode('utf-8'), flags), 're'
+        )
+    
+    def find_all(self, rule, content, budget=None, spans=None):
+        """Return all matches of a rule within spans (default: whole content), raising RegexTimeout past the budget"""
+        budget = self.rule_budget if budget is None else budget
+        deadline = time.monotonic() + budget if budget else None
+        matches = []
+        
+        with time_budget(budget) as interruptible:
+            # Only SIGALRM can stop a backtracking match, and only in a main thread (pool workers
+            # included); elsewhere the budget is soft, checked between matches below
+            if deadline is not None and not interruptible and not self.warned_soft_budget and rule.engine == 're':
+                self.warned_soft_budget = True
+                print("⚠️ Rule time budget can't interrupt a match here (not the main thread, or a timer is set) - "
+                      "only checking it between matches")
+            for start, end in (spans if spans is not None else [(0, None)]):
+                for match in rule.finditer(content, start, end):
+                    matches.append(match)
+                    # Cooperative check for threads where SIGALRM is unavailable
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise RegexTimeout()
+        
+        return matches
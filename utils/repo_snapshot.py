@@ -0,0 +1,126 @@
+"""
+Single-pass Repository Snapshot
+"""
+
+import os
+import mmap
+from config.settings import SCAN_MODE
+from utils.solidity_lexer import CODE_VIEWS
+from utils.file_enumerator import FileEnumerator
+from utils.git_utils import git_blob_id
+
+def decode_source(raw):
+    """Text of raw source bytes; line endings are kept, as when decoding a git blob"""
+    return raw.decode('utf-8', errors='ignore')
+
+def load_source(file_path, mode='text'):
+    """Decoded text, or a read-only memory map of the raw bytes in 'bytes' mode"""
+    if mode != 'bytes':
+        with open(file_path, 'rb') as f:
+            return decode_source(f.read())
+    
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''  # Empty files cannot be mapped
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class RepoSnapshot:
+    """Walks a repository once and loads each file at most once, shared by all detectors"""
+    
+    def __init__(self, repo_path, extension='.sol', mode=SCAN_MODE, enumerator=None):
+        self.repo_path = repo_path
+        self.extension = extension
+        self.mode = mode
+        self.enumerator = enumerator or FileEnumerator(extensions=(extension,))
+        # Working tree contents need not match any commit
+        self.commit = None
+        self._files = None
+        self._contents = {}
+        self._hashes = {}
+    
+    @property
+    def files(self):
+        """All matching files in the repository, enumerated on first access"""
+        if self._files is None:
+            self._files = self.enumerator.list_files(self.repo_path)
+        return self._files
+    
+    @property
+    def skipped_files(self):
+        """Matching files the enumerator left out as generated or oversized, as {'file', 'reason', 'size'}"""
+        self.files
+        return self.enumerator.skipped
+    
+    def source_bytes(self):
+        """Total on-disk size of all matching files"""
+        total = 0
+        for file_path in self.files:
+            try:
+                total += os.path.getsize(file_path)
+            except OSError:
+                pass
+        return total
+    
+    def read(self, file_path):
+        """Return file contents, reading from disk only on first use"""
+        content = self._contents.get(file_path)
+        if content is not None:
+            return content
+        
+        try:
+            if self.mode == 'bytes':
+                content = load_source(file_path, self.mode)
+            else:
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                # Hashed before decoding drops any invalid UTF-8, so the id is the blob's own
+                self._hashes[file_path] = git_blob_id(raw)
+                content = decode_source(raw)
+        except Exception as e:
+            print(f"⚠️ Error reading file {file_path}: {e}")
+            return None
+        
+        # Mappings are not cached: each holds a descriptor and unmaps once callers drop it
+        if self.mode != 'bytes':
+            self._contents[file_path] = content
+        return content
+    
+    def content_hash(self, file_path):
+        """Git blob id of the file contents, computed once per file"""
+        # The same id a git-sourced snapshot lists, so results cached by one are found by the other
+        digest = self._hashes.get(file_path)
+        if digest is None:
+            content = self.read(file_path)
+            if content is None:
+                return None
+            # Text reads record the id as they load; bytes mode hashes the mapping
+            digest = self._hashes.get(file_path) or git_blob_id(content)
+            self._hashes[file_path] = digest
+        return digest
+    
+    def code_view(self, file_path, content=None):
+        """File contents with comments and strings blanked, lexed once per unique blob"""
+        if content is None:
+            content = self.read(file_path)
+        if content is None:
+            return None
+        return CODE_VIEWS.get(self.content_hash(file_path), content)
+    
+    def iter_contents(self, file_paths=None):
+        """Yield (file_path, content) pairs, skipping unreadable files"""
+        for file_path in (self.files if file_paths is None else file_paths):
+            content = self.read(file_path)
+            if content is not None:
+                yield file_path, content
+    
+    def release(self):
+        """Drop all cached file contents"""
+        self._contents.clear()
+        self._hashes.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
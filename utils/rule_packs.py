@@ -0,0 +1,235 @@
+"""
+Declarative Rule Packs Compiled to a Cached Ruleset Artifact
+"""
+
+import os
+import re
+import json
+import glob
+import time
+import yaml
+from config.settings import RULE_PACKS_DIR, RULESET_ARTIFACT_PATH, RULESET_RELOAD_INTERVAL
+from utils.finding_cache import ruleset_hash
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bump when the artifact layout changes so stale artifacts are recompiled
+ARTIFACT_FORMAT = 1
+
+SEVERITIES = ('CRITICAL', 'HIGH', 'MEDIUM')
+FLAGS = {'IGNORECASE': re.IGNORECASE, 'MULTILINE': re.MULTILINE, 'DOTALL': re.DOTALL}
+SCOPE_KINDS = ('function', 'modifier', 'contract', 'interface', 'library')
+DEFAULT_VULNERABILITY_TYPE = 'amm_price_manipulation'
+
+class RulePackError(Exception):
+    """Raised when a rule pack is malformed"""
+
+def _pack_files(pack_dir):
+    return sorted(glob.glob(os.path.join(pack_dir, '*.yaml')) + glob.glob(os.path.join(pack_dir, '*.yml')))
+
+def pack_fingerprint(pack_dir):
+    """(file, mtime, size) of every pack, cheap enough to check on each scan"""
+    fingerprint = []
+    for pack_file in _pack_files(pack_dir):
+        stat = os.stat(pack_file)
+        fingerprint.append([os.path.basename(pack_file), stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+def _compile_rule(pack_name, spec, seen_ids):
+    """Validate one rule and normalize it to plain data"""
+    rule_id = spec.get('id')
+    if not rule_id or rule_id in seen_ids:
+        raise RulePackError(f"{pack_name}: missing or duplicate rule id {rule_id!r}")
+    seen_ids.add(rule_id)
+    
+    if spec.get('severity') not in SEVERITIES:
+        raise RulePackError(f"{rule_id}: severity must be one of {', '.join(SEVERITIES)}")
+    
+    try:
+        flags = 0
+        for flag in spec.get('flags', []):
+            flags |= FLAGS[flag]
+        re.compile(spec['pattern'], flags)
+    except KeyError as e:
+        raise RulePackError(f"{rule_id}: unknown flag or missing pattern {e}")
+    except re.error as e:
+        raise RulePackError(f"{rule_id}: invalid pattern: {e}")
+    
+    scope = spec.get('scope')
+    if scope is not None:
+        kinds = scope.get('kinds', ['function'])
+        if any(kind not in SCOPE_KINDS for kind in kinds):
+            raise RulePackError(f"{rule_id}: scope kinds must be among {', '.join(SCOPE_KINDS)}")
+        scope = {'kinds': list(kinds), 'mutability': scope.get('mutability')}
+    
+    return {
+        'id': rule_id,
+        'pack': pack_name,
+        'description': spec.get('description', ''),
+        'severity': spec['severity'],
+        'pattern': spec['pattern'],
+        'flags': flags,
+        'anchors': list(spec.get('anchors', [])),
+        'scope': scope,
+        'classify': list(spec.get('classify', []))
+    }
+
+def compile_rule_packs(pack_dir):
+    """Parse and validate every pack in pack_dir into one ruleset"""
+    rules = []
+    seen_ids = set()
+    interfaces = []
+    indicators = []
+    vulnerability_types = {}
+    packs = []
+    
+    for pack_file in _pack_files(pack_dir):
+        try:
+            with open(pack_file, 'r') as f:
+                pack = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            raise RulePackError(f"Cannot read rule pack {pack_file}: {e}")
+        
+        pack_name = pack.get('pack') or os.path.splitext(os.path.basename(pack_file))[0]
+        packs.append(pack_name)
+        
+        for spec in pack.get('rules', []):
+            rules.append(_compile_rule(pack_name, spec, seen_ids))
+        
+        v2_detection = pack.get('v2_detection', {})
+        interfaces.extend(v2_detection.get('interfaces', []))
+        indicators.extend(v2_detection.get('indicators', []))
+        vulnerability_types.update(pack.get('vulnerability_types', {}))
+    
+    if not rules:
+        raise RulePackError(f"No rules found in {pack_dir}")
+    
+    # Detectors key anchors and scopes by pattern, so two rules can't share one
+    patterns = [rule['pattern'] for rule in rules]
+    if len(set(patterns)) != len(patterns):
+        raise RulePackError("Two rules share the same pattern")
+    
+    # Most severe rules run (and report) first, pack order within a severity
+    rules.sort(key=lambda rule: SEVERITIES.index(rule['severity']))
+    
+    ruleset = {
+        'packs': packs,
+        'rules': rules,
+        'v2_detection': {
+            'interfaces': [interface['literal'] for interface in interfaces],
+            'amm_types': {interface['literal']: interface.get('amm_type') for interface in interfaces},
+            'indicators': list(dict.fromkeys(indicators))
+        },
+        'vulnerability_types': vulnerability_types
+    }
+    ruleset['version'] = ruleset_hash(ruleset)
+    return ruleset
+
+def classify_finding(rule, finding):
+    """Vulnerability type for a finding from its rule's classify conditions (first match wins)"""
+    for condition in (rule or {}).get('classify', []):
+        field = condition.get('field')
+        if field is None or any(word in finding.get(field, '') for word in condition.get('contains', [])):
+            return condition['type']
+    return DEFAULT_VULNERABILITY_TYPE
+
+class RulesetLoader:
+    """Loads the compiled ruleset artifact, recompiling and hot-reloading when packs change"""
+    
+    def __init__(self, pack_dir=RULE_PACKS_DIR, artifact_path=RULESET_ARTIFACT_PATH,
+                 reload_interval=RULESET_RELOAD_INTERVAL):
+        self.pack_dir = pack_dir
+        self.artifact_path = artifact_path
+        self.reload_interval = reload_interval
+        self._ruleset = None
+        self._rules_by_id = {}
+        self._checked_at = 0
+        self._failed_fingerprint = None
+    
+    @property
+    def ruleset(self):
+        """Current ruleset, loaded on first use"""
+        self._ensure_loaded()
+        return self._ruleset
+    
+    def rule(self, rule_id):
+        """Rule definition by id, or None"""
+        self._ensure_loaded()
+        return self._rules_by_id.get(rule_id)
+    
+    def reload_if_changed(self):
+        """Recompile after a pack was edited; returns True when the ruleset changed"""
+        if self._ruleset is None:
+            self._ensure_loaded()
+            return False
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return False
+        
+        fingerprint = pack_fingerprint(self.pack_dir)
+        if fingerprint in (self._ruleset['fingerprint'], self._failed_fingerprint):
+            self._checked_at = time.monotonic()
+            return False
+        
+        try:
+            ruleset = self._load(fingerprint)
+        except RulePackError as e:
+            # Keep scanning with the last good rules until the pack is fixed
+            logger.warning(f"⚠️ Rule pack reload failed, keeping ruleset {self._ruleset['version']}: {e}")
+            self._failed_fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            return False
+        
+        changed = ruleset['version'] != self._ruleset['version']
+        self._set(ruleset)
+        if changed:
+            logger.info(f"🔄 Reloaded rule packs: ruleset {ruleset['version']}")
+        return changed
+    
+    def _ensure_loaded(self):
+        if self._ruleset is None:
+            self._set(self._load(pack_fingerprint(self.pack_dir)))
+    
+    def _set(self, ruleset):
+        self._ruleset = ruleset
+        self._rules_by_id = {rule['id']: rule for rule in ruleset['rules']}
+        self._checked_at = time.monotonic()
+    
+    def _load(self, fingerprint):
+        """Use the artifact when it was compiled from exactly these packs, else recompile it"""
+        artifact = self._read_artifact()
+        if artifact and artifact.get('format') == ARTIFACT_FORMAT and artifact.get('fingerprint') == fingerprint:
+            return artifact
+        
+        ruleset = compile_rule_packs(self.pack_dir)
+        ruleset['format'] = ARTIFACT_FORMAT
+        ruleset['fingerprint'] = fingerprint
+        self._write_artifact(ruleset)
+        return ruleset
+    
+    def _read_artifact(self):
+        try:
+            with open(self.artifact_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_artifact(self, ruleset):
+        try:
+            os.makedirs(os.path.dirname(self.artifact_path) or '.', exist_ok=True)
+            # Concurrent scanners may compile at once; replace atomically
+            temp_path = f"{self.artifact_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(ruleset, f)
+            os.replace(temp_path, self.artifact_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write ruleset artifact {self.artifact_path}: {e}")
+
+_default_loader = None
+
+def default_ruleset_loader():
+    """Process-wide loader shared by every detector"""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = RulesetLoader()
+    return _default_loader
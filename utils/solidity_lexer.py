@@ -0,0 +1,95 @@
+"""
+Solidity Lexer Stage - Comment and String Stripping
+"""
+
+import re
+from collections import OrderedDict
+from config.settings import STRIP_COMMENTS_AND_STRINGS, CODE_VIEW_CACHE_SIZE, CODE_VIEW_CACHE_MB
+
+# Bump when the lexer output changes so cached findings are invalidated
+LEXER_VERSION = 1
+CODE_VIEW_VERSION = f"{LEXER_VERSION}:{'stripped' if STRIP_COMMENTS_AND_STRINGS else 'raw'}"
+
+TOKEN_SOURCE = (
+    r'(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))'
+    r'|(?P<string>"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?)'
+)
+TOKENS = re.compile(TOKEN_SOURCE, re.DOTALL)
+TOKENS_BYTES = re.compile(TOKEN_SOURCE.encode('utf-8'), re.DOTALL)
+NOT_NEWLINE = re.compile(r'[^\n]')
+NOT_NEWLINE_BYTES = re.compile(rb'[^\n]')
+
+def _blank_text(match):
+    token = match.group()
+    if match.lastgroup == 'comment':
+        return NOT_NEWLINE.sub(' ', token)
+    # Keep the quotes so the code around the literal still parses the same way
+    closed = len(token) > 1 and token[-1] == token[0] and token[-2] != '\\'
+    return token[0] + ' ' * (len(token) - 2) + token[-1] if closed else token[0] + ' ' * (len(token) - 1)
+
+def _blank_bytes(match):
+    token = match.group()
+    if match.lastgroup == 'comment':
+        return NOT_NEWLINE_BYTES.sub(b' ', token)
+    closed = len(token) > 1 and token[-1:] == token[:1] and token[-2:-1] != b'\\'
+    return token[:1] + b' ' * (len(token) - 2) + token[-1:] if closed else token[:1] + b' ' * (len(token) - 1)
+
+def strip_comments_and_strings(content):
+    """Code view of a source file with comments and string contents blanked to spaces"""
+    # Every character keeps its offset and newlines survive, so positions in the
+    # code view map one-to-one onto lines and columns of the original source
+    if isinstance(content, str):
+        return TOKENS.sub(_blank_text, content)
+    return TOKENS_BYTES.sub(_blank_bytes, content)
+
+def code_view(content):
+    """Input for detectors: the code view when stripping is enabled, else the raw source"""
+    if not STRIP_COMMENTS_AND_STRINGS or content is None:
+        return content
+    return strip_comments_and_strings(content)
+
+class LexedCache:
+    """LRU of per-blob lexer products keyed by content hash, shared by every detector in the process"""
+    
+    def __init__(self, build, max_entries=CODE_VIEW_CACHE_SIZE, max_bytes=None, size=len):
+        self.build = build
+        self.max_entries = max_entries
+        # With max_bytes, entries are also evicted by their total size
+        self.max_bytes = max_bytes
+        self.size = size
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+    
+    def get(self, content_hash, content):
+        """Product for content, building it only the first time its hash is seen"""
+        if content_hash is None:
+            return self.build(content)
+        
+        # Text and bytes products of one blob differ in offsets wherever it holds non-ASCII
+        key = (content_hash, isinstance(content, str))
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return cached[0]
+        
+        entry = self.build(content)
+        entry_bytes = self.size(entry) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and entry_bytes > self.max_bytes:
+            # Too big to keep without flushing everything else
+            return entry
+        
+        self._entries[key] = (entry, entry_bytes)
+        self.total_bytes += entry_bytes
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_bytes
+        return entry
+    
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+# Full-size copies of each source, so bounded by bytes as well as by count
+CODE_VIEWS = LexedCache(code_view, max_bytes=CODE_VIEW_CACHE_MB * 1024 * 1024)